@@ -1,14 +1,159 @@
+import hashlib
+import json
+import os
+import re
+
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 from collections import defaultdict
 
-def analisar_elemento_automatico(tag):
-    """Analisa automaticamente o propósito de um elemento"""
+from page_cache import CACHE_DIR, CacheMiss, PageCache, fetch
+
+LIMITE_TEXTO = 100
+# Tipos de string que get_text() considera na maioria das tags (script, style e
+# template têm tipos próprios)
+TIPOS_TEXTO = frozenset({NavigableString, CData})
+
+# Regras de propósito por classes/id e por texto, em ordem de prioridade: vale a
+# primeira regra que casar. Pode ser substituída por um JSON no mesmo formato
+# (variável de ambiente ELEMENTOS_REGRAS ou carregar_regras(caminho)).
+REGRAS_PADRAO = {
+    "identificadores": [
+        {"proposito": "Navegação/Menu", "palavras": ["nav", "menu", "navbar"]},
+        {"proposito": "Cabeçalho", "palavras": ["header", "topo", "top"]},
+        {"proposito": "Rodapé", "palavras": ["footer", "rodape", "bottom"]},
+        {"proposito": "Barra lateral", "palavras": ["sidebar", "lateral", "aside"]},
+        {"proposito": "Conteúdo principal", "palavras": ["content", "main", "principal"]},
+        {"proposito": "Publicidade", "palavras": ["ad", "banner", "publicidade"]},
+        {"proposito": "Busca", "palavras": ["search", "busca", "pesquisa"]},
+        {"proposito": "Redes sociais", "palavras": ["social", "share", "compartilhar"]},
+        {"proposito": "Player de vídeo", "palavras": ["video", "player"]},
+        {"proposito": "Formulário", "palavras": ["form", "formulario"]},
+        {"proposito": "Botão de ação", "palavras": ["button", "btn"]},
+        {"proposito": "Título", "palavras": ["title", "titulo", "heading"]},
+        {"proposito": "Data/hora", "palavras": ["date", "data", "time"]},
+        {"proposito": "Autor", "palavras": ["author", "autor"]},
+    ],
+    # contem: alguma das palavras no texto (minúsculo); contem_todos: todas;
+    # prefixos: o texto começa com um deles
+    "texto": [
+        {"proposito": "Copyright", "contem": ["copyright", "©", "todos os direitos"]},
+        {"proposito": "Contato/email", "contem_todos": ["@", "."]},
+        {"proposito": "Preço/valor", "prefixos": ["R$", "$", "€"]},
+    ],
+}
+
+class Regras:
+    """
+    Tabela de regras compilada uma vez: todas as palavras de classes/id viram
+    uma única regex (lookahead em cada posição, alternativas em ordem de
+    prioridade), então cada elemento é varrido uma vez só.
+    """
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+        # Identifica a tabela nas análises guardadas em cache
+        self.assinatura = hashlib.sha1(json.dumps(tabela, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        self.propositos = [r["proposito"] for r in tabela.get("identificadores", [])]
+        self.regra_da_palavra = {}
+        alternativas = []
+        for i, regra in enumerate(tabela.get("identificadores", [])):
+            palavras = sorted({p.lower() for p in regra["palavras"]}, key=len, reverse=True)
+            for palavra in palavras:
+                if palavra not in self.regra_da_palavra:
+                    self.regra_da_palavra[palavra] = i
+                    alternativas.append(re.escape(palavra))
+        self.regex = re.compile("(?=(" + "|".join(alternativas) + "))") if alternativas else None
+        self.regras_texto = []
+        for regra in tabela.get("texto", []):
+            contem = [p.lower() for p in regra.get("contem", [])]
+            self.regras_texto.append((
+                regra["proposito"],
+                re.compile("|".join(map(re.escape, contem))) if contem else None,
+                [p.lower() for p in regra.get("contem_todos", [])],
+                tuple(regra.get("prefixos", [])),
+            ))
+
+    def por_identificadores(self, identificadores):
+        """Propósito da regra de maior prioridade que aparece em classes/id (ou None)."""
+        if self.regex is None:
+            return None
+        melhor = None
+        for m in self.regex.finditer(identificadores):
+            i = self.regra_da_palavra[m.group(1)]
+            if melhor is None or i < melhor:
+                melhor = i
+                if i == 0:
+                    break
+        return None if melhor is None else self.propositos[melhor]
+
+    def por_texto(self, texto):
+        minusculo = texto.lower()
+        for proposito, contem, contem_todos, prefixos in self.regras_texto:
+            if contem is not None and contem.search(minusculo):
+                return proposito
+            if contem_todos and all(p in minusculo for p in contem_todos):
+                return proposito
+            if prefixos and texto.startswith(prefixos):
+                return proposito
+        return None
+
+def carregar_regras(caminho=None):
+    """Regras compiladas de um JSON no formato de REGRAS_PADRAO (sem caminho: as padrão)."""
+    if not caminho:
+        return Regras(REGRAS_PADRAO)
+    with open(caminho, "r", encoding="utf-8") as f:
+        return Regras(json.load(f))
+
+REGRAS = carregar_regras(os.environ.get("ELEMENTOS_REGRAS"))
+
+def prefixos_de_texto(soup, limite=LIMITE_TEXTO):
+    """
+    Devolve {id(tag): tag.get_text(strip=True)[:limite]} para todas as tags,
+    numa única passada de baixo para cima: cada tag junta os prefixos já
+    calculados dos filhos e para ao atingir o limite, em vez de percorrer a
+    subárvore inteira de novo (custo de <html>/<body> deixa de ser O(página)).
+    """
+    prefixos = {}
+    # Em ordem reversa do documento, os filhos vêm sempre antes do pai
+    for no in reversed(list(soup.descendants)):
+        if not isinstance(no, Tag):
+            continue
+        partes = []
+        tamanho = 0
+        for filho in no.contents:
+            if isinstance(filho, Tag):
+                parte = prefixos[id(filho)]
+            elif type(filho) in TIPOS_TEXTO:
+                parte = filho.strip()
+            else:
+                continue
+            if parte:
+                partes.append(parte)
+                tamanho += len(parte)
+                if tamanho >= limite:
+                    break
+        prefixos[id(no)] = ''.join(partes)[:limite]
+    # O texto "de fora" de script/style/template não conta para os ancestrais,
+    # mas o delas mesmas sim; são folhas pequenas, get_text direto resolve
+    for tag in soup.find_all(['script', 'style', 'template']):
+        if tag.interesting_string_types != TIPOS_TEXTO:
+            prefixos[id(tag)] = tag.get_text(strip=True)[:limite]
+    return prefixos
+
+def analisar_elemento_automatico(tag, texto=None, regras=None):
+    """
+    Analisa automaticamente o propósito de um elemento. texto: prefixo já
+    calculado de tag.get_text(strip=True) (ver prefixos_de_texto). regras:
+    tabela compilada (padrão: REGRAS).
+    """
+    regras = regras or REGRAS
     nome = tag.name
     classes = ' '.join(tag.get('class', []))
     id_elem = tag.get('id', '')
     attrs = tag.attrs
-    texto = tag.get_text(strip=True)[:100]
+    if texto is None:
+        texto = tag.get_text(strip=True)[:LIMITE_TEXTO]
     
     # Análise automática baseada em contexto
     proposito = []
@@ -38,43 +183,15 @@ def analisar_elemento_automatico(tag):
     # Análise por classes e IDs
     identificadores = (classes + ' ' + id_elem).lower()
     
-    if any(x in identificadores for x in ['nav', 'menu', 'navbar']):
-        proposito.append("Navegação/Menu")
-    elif any(x in identificadores for x in ['header', 'topo', 'top']):
-        proposito.append("Cabeçalho")
-    elif any(x in identificadores for x in ['footer', 'rodape', 'bottom']):
-        proposito.append("Rodapé")
-    elif any(x in identificadores for x in ['sidebar', 'lateral', 'aside']):
-        proposito.append("Barra lateral")
-    elif any(x in identificadores for x in ['content', 'main', 'principal']):
-        proposito.append("Conteúdo principal")
-    elif any(x in identificadores for x in ['ad', 'banner', 'publicidade']):
-        proposito.append("Publicidade")
-    elif any(x in identificadores for x in ['search', 'busca', 'pesquisa']):
-        proposito.append("Busca")
-    elif any(x in identificadores for x in ['social', 'share', 'compartilhar']):
-        proposito.append("Redes sociais")
-    elif any(x in identificadores for x in ['video', 'player']):
-        proposito.append("Player de vídeo")
-    elif any(x in identificadores for x in ['form', 'formulario']):
-        proposito.append("Formulário")
-    elif any(x in identificadores for x in ['button', 'btn']):
-        proposito.append("Botão de ação")
-    elif any(x in identificadores for x in ['title', 'titulo', 'heading']):
-        proposito.append("Título")
-    elif any(x in identificadores for x in ['date', 'data', 'time']):
-        proposito.append("Data/hora")
-    elif any(x in identificadores for x in ['author', 'autor']):
-        proposito.append("Autor")
+    encontrado = regras.por_identificadores(identificadores)
+    if encontrado:
+        proposito.append(encontrado)
     
     # Análise por conteúdo
     if texto:
-        if any(x in texto.lower() for x in ['copyright', '©', 'todos os direitos']):
-            proposito.append("Copyright")
-        elif '@' in texto and '.' in texto:
-            proposito.append("Contato/email")
-        elif texto.startswith(('R$', '$', '€')):
-            proposito.append("Preço/valor")
+        encontrado = regras.por_texto(texto)
+        if encontrado:
+            proposito.append(encontrado)
     
     # Análise por tipo de elemento
     if nome == 'meta':
@@ -87,22 +204,130 @@ def analisar_elemento_automatico(tag):
     
     return proposito if proposito else ["Elemento de estrutura/estilização"]
 
-def descobrir_elementos(url):
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
+# Backends de análise: "html.parser" (BeautifulSoup puro Python, o original),
+# "lxml" (BeautifulSoup sobre o parser em C) e "stream" (lxml.etree puro, em
+# streaming: classifica cada elemento quando ele fecha e descarta a subárvore,
+# guardando só as contagens). Em HTML malformado os parsers podem corrigir a
+# árvore de formas diferentes (ex.: o libxml2 cria <html>/<body> implícitos).
+BACKENDS = ("html.parser", "lxml", "stream")
+# Texto dessas tags não entra no get_text() dos ancestrais
+TAGS_TEXTO_PROPRIO = frozenset({"script", "style", "template"})
+
+class ElementoLeve:
+    """O pouco de bs4.Tag que analisar_elemento_automatico usa (name, attrs, get)."""
+    __slots__ = ("name", "attrs")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def get(self, chave, padrao=None):
+        return self.attrs.get(chave, padrao)
+
+def analisar_soup(soup, regras=None):
+    """Contagens {tag: {propósito: n}} de uma árvore BeautifulSoup."""
     elementos_analisados = defaultdict(lambda: defaultdict(int))
-    
-    print(f"ANÁLISE AUTOMÁTICA DE {url}\n" + "="*60)
-    
-    # Analisar cada elemento
+    # Textos calculados numa passada só
+    textos = prefixos_de_texto(soup)
     for tag in soup.find_all():
-        propositos = analisar_elemento_automatico(tag)
+        propositos = analisar_elemento_automatico(tag, textos[id(tag)], regras)
         for proposito in propositos:
             elementos_analisados[tag.name][proposito] += 1
-    
-    # Exibir resultados
+    return elementos_analisados
+
+def analisar_streaming(pedacos, regras=None, encoding=None, limite=LIMITE_TEXTO):
+    """
+    Contagens {tag: {propósito: n}} a partir dos bytes do HTML em pedaços, sem
+    montar a árvore inteira. Cada elemento é classificado no evento "end" (o
+    prefixo de texto sai dos filhos já fechados) e a subárvore é descartada.
+    A ordem de inserção dos propósitos é a da primeira ocorrência no documento,
+    como em analisar_soup, para o relatório sair igual. Dentro de <template> o
+    BeautifulSoup guarda o texto como TemplateString, que analisar_soup ignora:
+    os elementos abaixo de um template são classificados sem texto, e só o
+    próprio template usa o texto da subárvore.
+    """
+    from lxml import etree
+
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+    contagens = defaultdict(lambda: defaultdict(int))
+    primeira = {}
+    ordem = {}
+    prefixos = {}
+    proximo = 0
+    em_template = 0
+
+    def texto_de(elemento):
+        partes = []
+        tamanho = 0
+
+        def juntar(trecho):
+            nonlocal tamanho
+            if trecho and tamanho < limite:
+                partes.append(trecho)
+                tamanho += len(trecho)
+
+        juntar((elemento.text or "").strip())
+        for filho in elemento:
+            prefixo = prefixos.pop(filho, "")
+            if isinstance(filho.tag, str) and filho.tag not in TAGS_TEXTO_PROPRIO:
+                juntar(prefixo)
+            juntar((filho.tail or "").strip())
+        return "".join(partes)[:limite]
+
+    def processar(eventos):
+        nonlocal proximo, em_template
+        for evento, elemento in eventos:
+            if not isinstance(elemento.tag, str):
+                continue
+            if evento == "start":
+                ordem[elemento] = proximo
+                proximo += 1
+                if elemento.tag == "template":
+                    em_template += 1
+                continue
+            texto = texto_de(elemento)
+            prefixos[elemento] = texto
+            if elemento.tag == "template":
+                em_template -= 1
+            elif em_template:
+                texto = ""
+            attrs = dict(elemento.attrib)
+            if "class" in attrs:
+                attrs["class"] = attrs["class"].split()
+            indice = ordem.pop(elemento, proximo)
+            for proposito in analisar_elemento_automatico(ElementoLeve(elemento.tag, attrs), texto, regras):
+                contagens[elemento.tag][proposito] += 1
+                chave = (elemento.tag, proposito)
+                if chave not in primeira or indice < primeira[chave]:
+                    primeira[chave] = indice
+            # Só o rabo (texto depois da tag) ainda interessa ao pai
+            del elemento[:]
+            elemento.text = None
+            elemento.attrib.clear()
+
+    for pedaco in pedacos:
+        parser.feed(pedaco)
+        processar(parser.read_events())
+    parser.close()
+    processar(parser.read_events())
+
+    elementos_analisados = defaultdict(lambda: defaultdict(int))
+    for elemento, propositos in contagens.items():
+        for proposito, qtd in sorted(propositos.items(), key=lambda x: primeira[(elemento, x[0])]):
+            elementos_analisados[elemento][proposito] = qtd
+    return elementos_analisados
+
+def analisar_html(conteudo, regras=None, backend="html.parser", encoding=None):
+    """Contagens {tag: {propósito: n}} do HTML já baixado (bytes ou str)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"backend desconhecido: {backend} (use um de {', '.join(BACKENDS)})")
+    if backend == "stream":
+        if isinstance(conteudo, str):
+            conteudo, encoding = conteudo.encode("utf-8"), "utf-8"
+        return analisar_streaming([conteudo], regras, encoding)
+    return analisar_soup(BeautifulSoup(conteudo, backend), regras)
+
+def imprimir_relatorio(elementos_analisados):
     for elemento, propositos in sorted(elementos_analisados.items()):
         total = sum(propositos.values())
         print(f"\n{elemento.upper()} ({total} ocorrências)")
@@ -111,5 +336,58 @@ def descobrir_elementos(url):
             porcentagem = (qtd/total) * 100
             print(f"  → {proposito}: {qtd}x ({porcentagem:.1f}%)")
 
-# Executar - não precisa configurar nada!
-descobrir_elementos('https://www.uol.com.br/')
\ No newline at end of file
+def chave_analise(backend, regras=None):
+    """Chave da análise no cache de páginas: mesmo backend e mesmas regras."""
+    return f"{backend}:{(regras or REGRAS).assinatura}"
+
+def descobrir_elementos(url, regras=None, backend="html.parser", cache=None, offline=False):
+    """
+    Baixa a página, analisa e imprime o relatório. cache: PageCache para
+    requisições condicionais (com 304 reaproveita o corpo e, se houver, a
+    análise já feita); offline=True usa só o cache. Com cache o corpo é baixado
+    inteiro para ser gravado, mesmo no backend "stream".
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend desconhecido: {backend} (use um de {', '.join(BACKENDS)})")
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    
+    print(f"ANÁLISE AUTOMÁTICA DE {url}\n" + "="*60)
+    
+    if cache is not None or offline:
+        cache = cache or PageCache()
+        pagina, corpo = fetch(url, cache, offline=offline, headers=headers)
+        chave = chave_analise(backend, regras)
+        salvo = cache.analysis(pagina, chave) if pagina is not None and corpo is None else None
+        if salvo is not None:
+            elementos_analisados = defaultdict(lambda: defaultdict(int))
+            for elemento, propositos in salvo.items():
+                elementos_analisados[elemento].update(propositos)
+        else:
+            if corpo is None:
+                corpo = cache.body(pagina)
+            elementos_analisados = analisar_html(corpo, regras, backend, pagina.encoding if pagina else None)
+            if pagina is not None:
+                cache.store_analysis(pagina, chave, elementos_analisados)
+    elif backend == "stream":
+        with requests.get(url, headers=headers, stream=True) as response:
+            # Sem charset no cabeçalho, o libxml2 detecta pelo <meta charset>
+            encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '') else None
+            elementos_analisados = analisar_streaming(response.iter_content(64 * 1024), regras, encoding)
+    else:
+        response = requests.get(url, headers=headers)
+        elementos_analisados = analisar_html(response.content, regras, backend)
+    
+    # Exibir resultados
+    imprimir_relatorio(elementos_analisados)
+    return elementos_analisados
+
+# Executar - não precisa configurar nada! (vários sites de uma vez: elementos_lote.py)
+# Cache de páginas em ELEMENTOS_CACHE (vazio desliga); ELEMENTOS_OFFLINE=1 usa só o cache
+if __name__ == "__main__":
+    pasta_cache = os.environ.get("ELEMENTOS_CACHE", CACHE_DIR)
+    try:
+        descobrir_elementos('https://www.uol.com.br/', backend=os.environ.get("ELEMENTOS_BACKEND", "html.parser"),
+                            cache=PageCache(pasta_cache) if pasta_cache else None,
+                            offline=os.environ.get("ELEMENTOS_OFFLINE") == "1")
+    except CacheMiss as e:
+        print(f"[error] {e}")
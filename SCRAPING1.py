@@ -1,24 +1,47 @@
 from __future__ import annotations
 
-import csv
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
 
-
-def initialise_driver() -> webdriver.Chrome:
-    """Configure and return a new Chrome WebDriver."""
+from browser_session import DEFAULT_DEBUGGER_ADDRESS, PROFILE_DIR, start_chrome
+from driver_profiles import (
+    apply_light_options,
+    apply_low_memory_options,
+    enable_performance_log,
+    enable_resource_blocking,
+    format_load_report,
+    page_load_report,
+)
+from popup_resolver import resolve_popups
+
+
+def initialise_driver(
+    light: bool = False,
+    profile_dir: Optional[str] = None,
+    attach: Optional[str] = None,
+    low_memory: bool = False,
+) -> webdriver.Chrome:
+    """Configure and return a new Chrome WebDriver.
+
+    light: block heavy resources and analytics hosts and use the "eager" page-load
+    strategy (see driver_profiles); bytes and load time can then be read with
+    driver_profiles.page_load_report. profile_dir / attach: persistent Chrome
+    profile or the address of a long-lived browser (see browser_session).
+    low_memory: headless with a capped renderer count and small window/caches.
+    """
     chrome_options = Options()
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     # chrome_options.add_argument("--headless")  # Uncomment for headless mode
+    if low_memory:
+        chrome_options.add_argument("--headless=new")
+        apply_low_memory_options(chrome_options)
     chrome_options.add_argument(
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -28,34 +51,25 @@ def initialise_driver() -> webdriver.Chrome:
         "excludeSwitches", ["enable-automation", "load-extension"]
     )
     chrome_options.add_experimental_option("useAutomationExtension", False)
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=chrome_options)
+    if light:
+        apply_light_options(chrome_options)
+        enable_performance_log(chrome_options)
+    driver = start_chrome(chrome_options, profile_dir=profile_dir, attach=attach)
+    if light:
+        enable_resource_blocking(driver)
+    return driver
 
 
-def accept_prompts(driver: webdriver.Chrome, wait: WebDriverWait) -> None:
-    """Accept disclaimer and cookie prompts if they appear."""
-    for _ in range(2):
-        try:
-            button = wait.until(
-                EC.element_to_be_clickable((By.ID, "accept-disclaimer"))
-            )
-            button.click()
-        except Exception as e:
-            print(f"Erro ao aceitar o disclaimer: {e}")
-            break
-    try:
-        cookie_button = wait.until(
-            EC.element_to_be_clickable(
-                (
-                    By.XPATH,
-                    "//button[contains(translate(., 'ACEITAR', 'aceitar'), 'aceitar todos os cookies') "
-                    "or contains(translate(., 'ACCEPT', 'accept'), 'accept all cookies')]",
-                )
-            )
-        )
-        cookie_button.click()
-    except Exception as e:
-        print(f"Erro ao aceitar cookies: {e}")
+def accept_prompts(driver: webdriver.Chrome, wait: WebDriverWait, grace: Optional[float] = None) -> None:
+    """Accept disclaimer and cookie prompts if they appear.
+
+    All candidate buttons are probed in one in-page script call (popup_resolver);
+    the selectors that worked are remembered per domain for the next run.
+    grace: give up early when no popup shows up (persistent profile).
+    """
+    clicked = resolve_popups(driver, timeout=10.0, grace=grace)
+    if not clicked:
+        print("Nenhum pop-up de disclaimer/cookies encontrado.")
 
 
 def extract_listings(driver: webdriver.Chrome) -> List[Dict[str, str]]:
@@ -96,47 +110,130 @@ def go_to_next_page(driver: webdriver.Chrome, wait: WebDriverWait) -> bool:
         return False
 
 
-def write_to_csv(rows: List[Dict[str, str]], filename: str = "vivalocal_images.csv") -> None:
-    """Write a list of dictionaries to CSV with headers."""
-    if not rows:
-        print("Nenhuma imagem encontrada, nenhum dado será salvo.")
-        return
-    fieldnames = list(rows[0].keys())
-    try:
-        with open(filename, mode="w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-        print(f"Arquivo {filename} salvo com sucesso.")
-    except Exception as e:
-        print(f"Erro ao escrever no arquivo CSV: {e}")
-
-
 def main() -> None:
+    import argparse
+
+    from crawl_metrics import CommandCounter, MetricsWriter, page_source_bytes
+    from crawl_sink import StreamingSink, load_checkpoint
+
+    parser = argparse.ArgumentParser(description="Coleta imagens do Vivalocal.")
+    parser.add_argument("--output", default="vivalocal_images.csv",
+                        help="output file (.csv, .jsonl, .csv.gz, .jsonl.gz or .parquet)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the checkpoint of an interrupted run")
+    parser.add_argument("--light", action="store_true",
+                        help="block images/fonts/CSS/media and analytics hosts")
+    parser.add_argument("--metrics", default="debug/crawl_metrics.jsonl",
+                        help="per-page metrics file (JSON Lines)")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, default=None,
+                        help="reuse a persistent Chrome profile (cookies/consent survive runs)")
+    parser.add_argument("--attach", nargs="?", const=DEFAULT_DEBUGGER_ADDRESS, default=None,
+                        help="attach to a browser started with `python browser_session.py serve`")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="lean headless Chrome for small VMs, with a memory watchdog")
+    parser.add_argument("--max-rss-mb", type=float, default=None,
+                        help="recycle the driver above this browser RSS (default with --low-memory: 1500)")
+    args = parser.parse_args()
+    popup_grace = 2.0 if (args.profile or args.attach) else None
+
     start_url = (
         "https://search.vivalocal.com/encontro-casual/sao-paulo/g?lb=new&search=1"
         "&start_field=1&select-this=132&searchGeoId=138&offer_type=offer&end_field="
     )
-    driver = initialise_driver()
-    all_rows: List[Dict[str, str]] = []
+    checkpoint = load_checkpoint(args.output) if args.resume else None
+
+    def new_driver() -> webdriver.Chrome:
+        return initialise_driver(
+            light=args.light, profile_dir=args.profile, attach=args.attach, low_memory=args.low_memory
+        )
+
+    watchdog = None
+    max_rss_mb = args.max_rss_mb or (1500.0 if args.low_memory else None)
+    if max_rss_mb:
+        from memory_watchdog import MemoryWatchdog
+
+        watchdog = MemoryWatchdog(limit_mb=max_rss_mb)
+    driver = new_driver()
+    commands = CommandCounter(driver)
+    metrics = MetricsWriter(args.metrics, scraper="SCRAPING1")
+    # Each page is appended and flushed as soon as it is extracted
+    sink = StreamingSink(
+        args.output,
+        ["image_src", "image_alt"],
+        append=checkpoint is not None,
+        metadata={"scraper": "SCRAPING1", "start_url": start_url},
+    )
     try:
-        driver.get(start_url)
-        wait = WebDriverWait(driver, 20)
-        accept_prompts(driver, wait)
         page_counter = 1
+        wait = WebDriverWait(driver, 20)
+        record = metrics.page(page_counter)
+        if checkpoint:
+            with record.phase("navigation"):
+                driver.get(checkpoint["url"])
+            with record.phase("popups"):
+                accept_prompts(driver, wait, grace=popup_grace)
+            with record.phase("navigation"):
+                has_next = go_to_next_page(driver, wait)
+            if not has_next:
+                print("Nenhuma página após o checkpoint.")
+                sink.finish()
+                return
+            page_counter = int(checkpoint["page"]) + 1
+            record.set(page=page_counter)
+        else:
+            with record.phase("navigation"):
+                driver.get(start_url)
+            with record.phase("popups"):
+                accept_prompts(driver, wait, grace=popup_grace)
         while True:
             print(f"Extraindo página {page_counter}…")
-            rows = extract_listings(driver)
-            all_rows.extend(rows)
+            with record.phase("extraction"):
+                rows = extract_listings(driver)
+            with record.phase("output"):
+                sink.write_page(page_counter, driver.current_url, rows)
             print(f"  {len(rows)} imagens encontradas nesta página.")
-            if not go_to_next_page(driver, wait):
+            if args.light:
+                load = page_load_report(driver)
+                record.set(network=load)
+                print(f"  rede: {format_load_report(load)}")
+            record.set(
+                url=driver.current_url,
+                anchors=len(rows),
+                listings=len(rows),
+                webdriver_commands=commands.count,
+                page_source_bytes=page_source_bytes(driver),
+            )
+            if watchdog is not None:
+                record.set(browser_rss_mb=watchdog.sample(driver))
+            metrics.write(record)
+            commands.reset()
+            record = metrics.page(page_counter + 1)
+            with record.phase("navigation"):
+                has_next = go_to_next_page(driver, wait)
+            if not has_next:
                 break
             page_counter += 1
-            time.sleep(2)  # Delay para ser educado com o servidor
-        write_to_csv(all_rows)
-        print(f"Coleta concluída. {len(all_rows)} entradas salvas em 'vivalocal_images.csv'.")
+            if watchdog is not None and watchdog.should_recycle():
+                # Page boundary: reopen the page we just reached in a fresh browser
+                url = driver.current_url
+                driver.quit()
+                driver = new_driver()
+                commands = CommandCounter(driver)
+                wait = WebDriverWait(driver, 20)
+                with record.phase("navigation"):
+                    driver.get(url)
+                with record.phase("popups"):
+                    accept_prompts(driver, wait, grace=popup_grace)
+            with record.phase("throttle"):
+                time.sleep(2)  # Delay para ser educado com o servidor
+        sink.finish()
+        print(f"Coleta concluída. {sink.rows_written} entradas salvas em '{args.output}'.")
     finally:
+        sink.close()
+        metrics.close()
         driver.quit()
+        if watchdog is not None:
+            watchdog.print_summary()
 
 
 if __name__ == "__main__":
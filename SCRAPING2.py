@@ -1,21 +1,29 @@
 from __future__ import annotations
 
-import csv
 import time
-from typing import Dict, List
-from selenium.common.exceptions import TimeoutException  # Importando a exceção TimeoutException
+from typing import Dict, List, Optional
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
 
+from browser_session import DEFAULT_DEBUGGER_ADDRESS, PROFILE_DIR, start_chrome
+from driver_profiles import apply_light_options, enable_performance_log, enable_resource_blocking
+from http_fetch import PageFetcher
+from popup_resolver import resolve_popups
+from scrape_skokka import next_page_url_from_html
 
-def initialise_driver() -> webdriver.Chrome:
-    """Configure and return a new Chrome WebDriver."""
+
+def initialise_driver(
+    light: bool = False, profile_dir: Optional[str] = None, attach: Optional[str] = None
+) -> webdriver.Chrome:
+    """Configure and return a new Chrome WebDriver.
+
+    light: block heavy resources and analytics hosts and use the "eager" page-load
+    strategy (see driver_profiles); bytes and load time can then be read with
+    driver_profiles.page_load_report. profile_dir / attach: persistent Chrome
+    profile or the address of a long-lived browser (see browser_session).
+    """
     chrome_options = Options()
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
@@ -29,113 +37,125 @@ def initialise_driver() -> webdriver.Chrome:
         "excludeSwitches", ["enable-automation", "load-extension"]
     )
     chrome_options.add_experimental_option("useAutomationExtension", False)
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=chrome_options)
+    if light:
+        apply_light_options(chrome_options)
+        enable_performance_log(chrome_options)
+    driver = start_chrome(chrome_options, profile_dir=profile_dir, attach=attach)
+    if light:
+        enable_resource_blocking(driver)
+    return driver
 
 
-def accept_prompts(driver: webdriver.Chrome, wait: WebDriverWait) -> None:
-    """Accept disclaimer and cookie prompts if they appear."""
-    for _ in range(2):
-        try:
-            button = wait.until(
-                EC.element_to_be_clickable((By.ID, "accept-disclaimer"))
-            )
-            button.click()
-        except Exception:
-            break
-    try:
-        cookie_button = wait.until(
-            EC.element_to_be_clickable(
-                (
-                    By.XPATH,
-                    "//button[contains(translate(., 'ACEITAR', 'aceitar'), 'aceitar todos os cookies') "
-                    "or contains(translate(., 'ACCEPT', 'accept'), 'accept all cookies')]",
-                )
-            )
-        )
-        cookie_button.click()
-    except Exception:
-        pass
+def accept_prompts(driver: webdriver.Chrome, wait: WebDriverWait, grace: Optional[float] = None) -> None:
+    """Accept disclaimer and cookie prompts if they appear.
 
+    All candidate buttons are probed in one in-page script call (popup_resolver);
+    the selectors that worked are remembered per domain for the next run.
+    grace: give up early when no popup shows up (persistent profile).
+    """
+    resolve_popups(driver, timeout=10.0, grace=grace)
 
-def extract_listings(driver: webdriver.Chrome) -> List[Dict[str, str]]:
-    """Extract information from all listings on the current page."""
-    data: List[Dict[str, str]] = []
-    
-    # Aguarde explicitamente até que os anúncios estejam visíveis
-    try:
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".offer__item"))
-        )
-    except TimeoutException:
-        print("Erro: Não foi possível encontrar os anúncios. Verifique a estrutura da página.")
-        return data  # Retorna lista vazia caso os anúncios não sejam encontrados
 
-    listings = driver.find_elements(By.CSS_SELECTOR, ".offer__item")
-    print(f"Anúncios encontrados: {len(listings)}")  # Log para verificar a quantidade de anúncios encontrados
+def parse_listings_html(source: str, base_url: str) -> List[Dict[str, str]]:
+    """Extract title, description and link of each .offer__item from raw (server-rendered) HTML."""
+    from urllib.parse import urljoin
 
-    for listing in listings:
+    from lxml import html
+
+    data: List[Dict[str, str]] = []
+    doc = html.fromstring(source)
+    for listing in doc.cssselect(".offer__item"):
         try:
-            title = listing.find_element(By.CSS_SELECTOR, ".offer__title").text
-            description = listing.find_element(By.CSS_SELECTOR, ".offer__description").text
-            link = listing.find_element(By.CSS_SELECTOR, "a").get_attribute("href")
+            title = listing.cssselect(".offer__title")[0].text_content().strip()
+            description = listing.cssselect(".offer__description")[0].text_content().strip()
+            link = urljoin(base_url, listing.cssselect("a")[0].get("href") or "")
             data.append({"title": title, "description": description, "link": link})
-        except Exception as e:
+        except IndexError as e:
             print(f"Erro ao extrair o anúncio: {e}")
             continue
     return data
 
 
-def go_to_next_page(driver: webdriver.Chrome, wait: WebDriverWait) -> bool:
-    """Navigate to the next results page using the specified button."""
-    try:
-        next_button = wait.until(
-            EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, ".pagination__next")
-            )
-        )
-        if next_button.is_enabled():
-            next_button.click()
-            wait.until(EC.staleness_of(next_button))
-            return True
-        return False
-    except Exception:
-        return False
-
-
-def write_to_csv(rows: List[Dict[str, str]], filename: str = "skokka_listings.csv") -> None:
-    """Write a list of dictionaries to CSV with headers."""
-    if not rows:
-        return
-    fieldnames = list(rows[0].keys())
-    with open(filename, mode="w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-
 def main() -> None:
+    import argparse
+
+    from crawl_metrics import MetricsWriter
+    from crawl_sink import StreamingSink, load_checkpoint
+
+    parser = argparse.ArgumentParser(description="Coleta anúncios do Skokka.")
+    parser.add_argument("--output", default="skokka_listings.csv",
+                        help="output file (.csv, .jsonl, .csv.gz, .jsonl.gz or .parquet)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the checkpoint of an interrupted run")
+    parser.add_argument("--light", action="store_true",
+                        help="lightweight browser profile for the fallback path")
+    parser.add_argument("--metrics", default="debug/crawl_metrics.jsonl",
+                        help="per-page metrics file (JSON Lines)")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, default=None,
+                        help="reuse a persistent Chrome profile (cookies/consent survive runs)")
+    parser.add_argument("--attach", nargs="?", const=DEFAULT_DEBUGGER_ADDRESS, default=None,
+                        help="attach to a browser started with `python browser_session.py serve`")
+    args = parser.parse_args()
+    popup_grace = 2.0 if (args.profile or args.attach) else None
+
     start_url = "https://br.skokka.com/encontros/sao-paulo/"
-    driver = initialise_driver()
-    all_rows: List[Dict[str, str]] = []
-    try:
+
+    def make_driver() -> webdriver.Chrome:
+        # Só é chamado quando o HTML simples não traz os anúncios
+        driver = initialise_driver(light=args.light, profile_dir=args.profile, attach=args.attach)
         driver.get(start_url)
-        wait = WebDriverWait(driver, 20)
-        accept_prompts(driver, wait)
-        page_counter = 1
-        while True:
+        accept_prompts(driver, WebDriverWait(driver, 20), grace=popup_grace)
+        return driver
+
+    checkpoint = load_checkpoint(args.output) if args.resume else None
+    fetcher = PageFetcher(content_selector=".offer__item", driver_factory=make_driver)
+    metrics = MetricsWriter(args.metrics, scraper="SCRAPING2")
+    # Each page is appended and flushed as soon as it is extracted
+    sink = StreamingSink(
+        args.output,
+        ["title", "description", "link"],
+        append=checkpoint is not None,
+        metadata={"scraper": "SCRAPING2", "start_url": start_url},
+    )
+    seen_urls = set()
+    url = start_url
+    page_counter = 1
+    if checkpoint and checkpoint.get("next_url"):
+        url = checkpoint["next_url"]
+        page_counter = int(checkpoint["page"]) + 1
+    try:
+        while url not in seen_urls:
+            seen_urls.add(url)
             print(f"Extraindo página {page_counter}…")
-            rows = extract_listings(driver)
-            all_rows.extend(rows)
+            record = metrics.page(page_counter, url)
+            with record.phase("navigation"):
+                result = fetcher.fetch(url)
+            with record.phase("extraction"):
+                rows = parse_listings_html(result.html, url)
             print(f"  {len(rows)} anúncios encontrados nesta página.")
-            if not go_to_next_page(driver, wait):
+            record.set(
+                fetch_path=result.path,
+                anchors=len(rows),
+                listings=len(rows),
+                page_source_bytes=len(result.html.encode("utf-8")),
+            )
+            if not rows:
+                metrics.write(record)
                 break
+            next_url = next_page_url_from_html(result.html, url)
+            with record.phase("output"):
+                sink.write_page(page_counter, url, rows, next_url=next_url)
+            metrics.write(record)
+            url = next_url
             page_counter += 1
             time.sleep(3)  # Aumentar o tempo de espera para garantir o carregamento da página
-        write_to_csv(all_rows)
-        print(f"Coleta concluída. {len(all_rows)} entradas salvas em 'skokka_listings.csv'.")
+        sink.finish()
+        print(f"Coleta concluída. {sink.rows_written} entradas salvas em '{args.output}'.")
     finally:
-        driver.quit()
+        sink.close()
+        metrics.close()
+        fetcher.print_summary()
+        fetcher.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,272 @@
+"""
+Benchmark local das estratégias de extração do scrape_skokka.
+
+Sobe um http.server local que serve páginas sintéticas com a mesma estrutura
+que extract_listings espera (a.line-clamp[data-pck], img.v-lazy-image com
+data-src, span de descrição, .pagination__next) em vários tamanhos, e mede
+cada estratégia sem tocar no site real:
+- batch / per_anchor: extract_listings no Chrome headless
+- offline: skokka_offline.parse_html sobre o HTML servido (sem navegador)
+- http: http_fetch.PageFetcher + parse_html (caminho HTTP-first)
+Também mede go_to_next_page entre as páginas.
+
+Páginas anonimizadas salvas (ex.: debug/page_N_ok.html) podem ser servidas no
+lugar das sintéticas com --fixtures DIR.
+
+Uso:
+    python bench_scrape_skokka.py --sizes 10 100 1000 --pages 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import gzip
+import html
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from http_fetch import PageFetcher
+from scrape_skokka import ANCHOR_SELECTORS, extract_listings, go_to_next_page, initialise_driver
+from skokka_offline import parse_html
+
+STRATEGIES = ("batch", "per_anchor", "offline", "http")
+
+WORDS = (
+    "acompanhante morena loira centro zona sul atendimento local próprio discreta "
+    "carinhosa fotos reais novidade massagem completo hotel motel apartamento"
+).split()
+
+
+def synthetic_page(size: int, page: int, total_pages: int, lazy: bool = False, seed: int = 7) -> str:
+    """
+    Página com `size` anúncios no formato do Skokka. Com lazy=True metade dos
+    cartões só é inserida depois da rolagem (exercita o wait_for_lazy_load).
+    """
+    rnd = random.Random(seed * 100003 + page * 1009 + size)
+    cards = []
+    for i in range(size):
+        ad_id = (page - 1) * size + i
+        title = " ".join(rnd.choice(WORDS) for _ in range(5)).capitalize()
+        desc = " ".join(rnd.choice(WORDS) for _ in range(18))
+        cards.append(
+            f'<li class="card"><div class="card__media">'
+            f'<img class="v-lazy-image" src="data:image/gif;base64,R0lGODlhAQABAAAAACw=" '
+            f'data-src="https://cdn.example.test/photos/{ad_id % 97}/{ad_id}.jpg" '
+            f'alt="{html.escape(title)}"></div>'
+            f'<a class="line-clamp no-underline" data-pck="{ad_id}" '
+            f'href="/anuncio/{ad_id}-{title.split()[0].lower()}">{html.escape(title)}</a>'
+            f"<span>{html.escape(desc)}</span></li>"
+        )
+    eager, deferred = (cards[: size // 2], cards[size // 2:]) if lazy else (cards, [])
+    pagination = (
+        f'<a class="pagination__next" rel="next" href="?page={page + 1}">Próxima</a>'
+        if page < total_pages else ""
+    )
+    lazy_script = ""
+    if deferred:
+        lazy_script = (
+            "<script>const deferred = " + json.dumps("".join(deferred)) + ";"
+            "window.addEventListener('scroll', function once(){"
+            "window.removeEventListener('scroll', once);"
+            "setTimeout(() => document.querySelector('ul.listing').insertAdjacentHTML('beforeend', deferred), 300);"
+            "});</script>"
+        )
+    return (
+        '<!doctype html><html lang="pt-BR"><head><meta charset="utf-8"><title>bench</title>'
+        "<style>.card{height:120px}</style></head><body>"
+        f'<ul class="listing">{"".join(eager)}</ul><nav class="pagination">{pagination}</nav>'
+        f"{lazy_script}</body></html>"
+    )
+
+
+class FixtureServer:
+    """http.server em thread servindo /bench/<size>/?page=N (ou os fixtures de um diretório)."""
+
+    def __init__(self, total_pages: int, lazy: bool = False, fixtures_dir: Optional[str] = None) -> None:
+        self.total_pages = total_pages
+        self.lazy = lazy
+        self.fixtures: List[str] = []
+        if fixtures_dir:
+            self.fixtures = sorted(glob.glob(os.path.join(fixtures_dir, "page_*_ok.html*")))
+        self._cache: Dict[tuple, bytes] = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = server.render(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url_for(self, size: int) -> str:
+        return f"{self.base_url}/bench/{size}/"
+
+    def render(self, path: str) -> Optional[bytes]:
+        parsed = urlparse(path)
+        parts = [p for p in parsed.path.split("/") if p]
+        if len(parts) != 2 or parts[0] != "bench" or not parts[1].isdigit():
+            return None
+        size = int(parts[1])
+        page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+        if page > self.total_pages:
+            return None
+        key = (size, page)
+        if key not in self._cache:
+            if self.fixtures:
+                fixture = self.fixtures[(page - 1) % len(self.fixtures)]
+                opener = gzip.open if fixture.endswith(".gz") else open
+                with opener(fixture, "rt", encoding="utf-8") as f:
+                    self._cache[key] = f.read().encode("utf-8")
+            else:
+                self._cache[key] = synthetic_page(size, page, self.total_pages, self.lazy).encode("utf-8")
+        return self._cache[key]
+
+    def __enter__(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _bench_browser(driver, start_url: str, pages: int, mode: str) -> Dict[str, float]:
+    wait = WebDriverWait(driver, 10)
+    driver.get(start_url)
+    listings = 0
+    extract_s = settle_s = nav_s = 0.0
+    for page in range(1, pages + 1):
+        stats: Dict = {}
+        t0 = time.perf_counter()
+        rows = extract_listings(driver, wait, mode=mode, stats=stats)
+        extract_s += time.perf_counter() - t0
+        settle_s += stats.get("settle_seconds", 0.0)
+        listings += len(rows)
+        if page < pages:
+            t0 = time.perf_counter()
+            if not go_to_next_page(driver, wait):
+                break
+            nav_s += time.perf_counter() - t0
+    return {"listings": listings, "extract_s": extract_s, "settle_s": settle_s, "nav_s": nav_s}
+
+
+def _bench_offline(server: FixtureServer, size: int, pages: int) -> Dict[str, float]:
+    sources = [server.render(f"/bench/{size}/?page={p}").decode("utf-8") for p in range(1, pages + 1)]
+    t0 = time.perf_counter()
+    listings = sum(len(parse_html(src, base_url=server.url_for(size))) for src in sources)
+    return {"listings": listings, "extract_s": time.perf_counter() - t0, "settle_s": 0.0, "nav_s": 0.0}
+
+
+def _bench_http(server: FixtureServer, size: int, pages: int) -> Dict[str, float]:
+    def no_browser():
+        raise RuntimeError("o benchmark HTTP não deve precisar do navegador")
+
+    fetcher = PageFetcher(content_selector=", ".join(ANCHOR_SELECTORS), driver_factory=no_browser)
+    listings = 0
+    extract_s = nav_s = 0.0
+    try:
+        for page in range(1, pages + 1):
+            url = f"{server.url_for(size)}?page={page}"
+            t0 = time.perf_counter()
+            result = fetcher.fetch(url)
+            nav_s += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            listings += len(parse_html(result.html, base_url=url))
+            extract_s += time.perf_counter() - t0
+    finally:
+        fetcher.close()
+    return {"listings": listings, "extract_s": extract_s, "settle_s": 0.0, "nav_s": nav_s}
+
+
+def run_benchmarks(
+    sizes: List[int],
+    pages: int,
+    strategies: List[str],
+    lazy: bool = False,
+    fixtures_dir: Optional[str] = None,
+) -> List[Dict[str, object]]:
+    results: List[Dict[str, object]] = []
+    needs_browser = any(s in ("batch", "per_anchor") for s in strategies)
+    with FixtureServer(pages, lazy=lazy, fixtures_dir=fixtures_dir) as server:
+        driver = initialise_driver(headless=True) if needs_browser else None
+        try:
+            for size in sizes:
+                for strategy in strategies:
+                    if strategy in ("batch", "per_anchor"):
+                        r = _bench_browser(driver, server.url_for(size), pages, strategy)
+                    elif strategy == "offline":
+                        r = _bench_offline(server, size, pages)
+                    else:
+                        r = _bench_http(server, size, pages)
+                    total_s = r["extract_s"] + r["nav_s"]
+                    results.append({
+                        "size": size,
+                        "strategy": strategy,
+                        "pages": pages,
+                        "listings": r["listings"],
+                        "expected": None if fixtures_dir else size * pages,
+                        "listings_per_s": r["listings"] / r["extract_s"] if r["extract_s"] else 0.0,
+                        "s_per_page": total_s / pages,
+                        "extract_s_per_page": (r["extract_s"] - r["settle_s"]) / pages,
+                        "settle_s_per_page": r["settle_s"] / pages,
+                        "nav_s_per_page": r["nav_s"] / pages,
+                    })
+        finally:
+            if driver is not None:
+                driver.quit()
+    return results
+
+
+def print_report(results: List[Dict[str, object]]) -> None:
+    print(f"{'tamanho':>8} {'estratégia':<11}{'anúncios':>10}{'anún/s':>11}"
+          f"{'s/pág':>9}{'extração':>10}{'lazy':>8}{'naveg.':>8}")
+    for r in results:
+        ok = "" if r["expected"] in (None, r["listings"]) else f"  (!) esperado {r['expected']}"
+        print(f"{r['size']:>8} {r['strategy']:<11}{r['listings']:>10}{r['listings_per_s']:>11.0f}"
+              f"{r['s_per_page']:>9.3f}{r['extract_s_per_page']:>10.3f}"
+              f"{r['settle_s_per_page']:>8.3f}{r['nav_s_per_page']:>8.3f}{ok}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark local das estratégias de extração.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--lazy", action="store_true", help="metade dos anúncios só aparece após rolar")
+    parser.add_argument("--fixtures", default=None, help="diretório com page_N_ok.html anonimizados")
+    parser.add_argument("--json", default=None, help="grava os resultados também em JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.pages, args.strategies, args.lazy, args.fixtures)
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Início rápido do Chrome para os scrapers.
+
+- O caminho do chromedriver resolvido pelo webdriver_manager fica em cache
+  (debug/chromedriver_cache.json); as próximas execuções não consultam versões.
+  A versão pode ser fixada com driver_version ou CHROMEDRIVER_VERSION; sem ela,
+  o cache é revalidado a cada DRIVER_CACHE_MAX_AGE_DAYS.
+- Perfil persistente (--user-data-dir): cookies e o aceite de idade/cookies
+  sobrevivem entre execuções, então os pop-ups normalmente nem aparecem. Um
+  perfil só pode ser usado por um Chrome por vez.
+- Navegador de longa duração: `python browser_session.py serve` sobe um Chrome
+  com porta de depuração e perfil persistente; os scrapers com
+  attach="127.0.0.1:9222" se conectam a ele em vez de abrir outro, e o
+  driver.quit() ao final não fecha esse navegador.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+DRIVER_CACHE_FILE = os.path.join("debug", "chromedriver_cache.json")
+DRIVER_CACHE_MAX_AGE_DAYS = 7.0
+PROFILE_DIR = "chrome_profile"
+DEFAULT_DEBUGGER_ADDRESS = "127.0.0.1:9222"
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+# Drivers iniciados em paralelo (scrape_skokka_parallel) resolvem o caminho um de cada vez
+_resolve_lock = threading.Lock()
+
+
+def _load_cache(path: str) -> Dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def chromedriver_path(
+    driver_version: Optional[str] = None,
+    cache_file: str = DRIVER_CACHE_FILE,
+    max_age_days: float = DRIVER_CACHE_MAX_AGE_DAYS,
+) -> str:
+    """Caminho do chromedriver, consultando o webdriver_manager só quando o cache não serve."""
+    driver_version = driver_version or os.environ.get("CHROMEDRIVER_VERSION") or None
+    with _resolve_lock:
+        return _resolve_driver(driver_version, cache_file, max_age_days)
+
+
+def _resolve_driver(driver_version: Optional[str], cache_file: str, max_age_days: float) -> str:
+    cache = _load_cache(cache_file)
+    path = cache.get("path", "")
+    if path and os.path.isfile(path):
+        if driver_version:
+            if cache.get("version") == driver_version:
+                return path
+        elif not cache.get("version"):
+            age = time.time() - float(cache.get("resolved_ts", 0))
+            if age < max_age_days * 86400:
+                return path
+
+    path = ChromeDriverManager(driver_version=driver_version).install()
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    tmp = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "path": path,
+            "version": driver_version or "",
+            "resolved_ts": time.time(),
+            "resolved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }, f, indent=2)
+    os.replace(tmp, cache_file)
+    return path
+
+
+def use_persistent_profile(options: Options, profile_dir: str = PROFILE_DIR) -> None:
+    """Aponta o Chrome para um perfil que persiste entre execuções."""
+    options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    options.add_argument("--profile-directory=Default")
+
+
+def browser_is_running(address: str = DEFAULT_DEBUGGER_ADDRESS, timeout: float = 1.0) -> bool:
+    """True se há um Chrome respondendo na porta de depuração."""
+    try:
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout) as resp:
+            return resp.status == 200
+    except OSError:
+        return False
+
+
+def start_chrome(
+    options: Options,
+    profile_dir: Optional[str] = None,
+    attach: Optional[str] = None,
+    driver_version: Optional[str] = None,
+    log_path: Optional[str] = None,
+) -> webdriver.Chrome:
+    """
+    Cria o driver com o chromedriver em cache. profile_dir: perfil persistente.
+    attach: endereço host:porta de um Chrome já aberto (ver `serve`); nesse caso
+    os argumentos de linha de comando de `options` não se aplicam, só as
+    capabilities (page_load_strategy, log de performance).
+    """
+    if attach:
+        if not browser_is_running(attach):
+            raise RuntimeError(f"nenhum Chrome escutando em {attach} (inicie com: python browser_session.py serve)")
+        attached = Options()
+        attached.debugger_address = attach
+        attached.page_load_strategy = options.page_load_strategy
+        logging_prefs = options.to_capabilities().get("goog:loggingPrefs")
+        if logging_prefs:
+            attached.set_capability("goog:loggingPrefs", logging_prefs)
+        options = attached
+    elif profile_dir:
+        use_persistent_profile(options, profile_dir)
+    try:
+        service = Service(chromedriver_path(driver_version), log_output=log_path)
+        return webdriver.Chrome(service=service, options=options)
+    except SessionNotCreatedException as e:
+        if driver_version or os.environ.get("CHROMEDRIVER_VERSION"):
+            # Versão fixada: resolver de novo daria o mesmo driver
+            raise
+        # Provável atualização do Chrome: o driver em cache não serve mais
+        print(f"[warn] O Chrome recusou o chromedriver em cache ({e.__class__.__name__}); resolvendo de novo.")
+        service = Service(chromedriver_path(max_age_days=0), log_output=log_path)
+        return webdriver.Chrome(service=service, options=options)
+
+
+def find_chrome_binary() -> str:
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise RuntimeError("executável do Chrome não encontrado no PATH")
+
+
+def launch_browser(
+    address: str = DEFAULT_DEBUGGER_ADDRESS,
+    profile_dir: str = PROFILE_DIR,
+    headless: bool = True,
+    extra_args: List[str] = (),
+) -> subprocess.Popen:
+    """Sobe um Chrome de longa duração com porta de depuração e perfil persistente."""
+    host, _, port = address.rpartition(":")
+    args = [
+        find_chrome_binary(),
+        f"--remote-debugging-address={host or '127.0.0.1'}",
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={os.path.abspath(profile_dir)}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+        "--lang=pt-BR",
+        "--disable-blink-features=AutomationControlled",
+        *extra_args,
+    ]
+    if headless:
+        args.append("--headless=new")
+    proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        if browser_is_running(address):
+            return proc
+        if proc.poll() is not None:
+            raise RuntimeError(f"o Chrome terminou ao iniciar (código {proc.returncode})")
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"o Chrome não abriu a porta de depuração em {address}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Chrome de longa duração e cache do chromedriver.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="mantém um Chrome aberto para os scrapers se conectarem (--attach)")
+    serve.add_argument("--address", default=DEFAULT_DEBUGGER_ADDRESS)
+    serve.add_argument("--profile", default=PROFILE_DIR)
+    serve.add_argument("--visible", action="store_true", help="abre com janela (padrão: headless)")
+    warm = sub.add_parser("driver", help="resolve e guarda em cache o caminho do chromedriver")
+    warm.add_argument("--version", default=None, help="versão fixa do chromedriver")
+    args = parser.parse_args(argv)
+
+    if args.command == "driver":
+        print(f"[info] chromedriver: {chromedriver_path(args.version, max_age_days=0)}")
+        return
+
+    if browser_is_running(args.address):
+        print(f"[info] Já existe um Chrome em {args.address}.")
+        return
+    proc = launch_browser(args.address, args.profile, headless=not args.visible)
+    print(f"[info] Chrome pronto em {args.address} (perfil '{args.profile}'). Ctrl+C para encerrar.")
+    try:
+        proc.wait()
+    except KeyboardInterrupt:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Métricas por página das coletas, gravadas como JSON Lines.
+
+Cada página vira um registro com os tempos por fase (navigation, scroll, popups,
+extraction…), contagens (âncoras, anúncios, comandos WebDriver) e o tamanho do
+page_source. O mesmo arquivo recebe várias execuções, separadas por run_id.
+
+Resumo de um arquivo (p50/p95 por fase):
+    python crawl_metrics.py debug/crawl_metrics.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_PATH = "debug/crawl_metrics.jsonl"
+
+PAGE_SOURCE_BYTES_SCRIPT = "return new Blob([document.documentElement.outerHTML]).size;"
+
+
+class CommandCounter:
+    """
+    Conta os comandos enviados ao chromedriver (cada um é um round trip HTTP).
+    Todas as chamadas de WebDriver/WebElement passam por driver.execute.
+    """
+
+    def __init__(self, driver) -> None:
+        self.count = 0
+        execute = driver.execute
+
+        def counting_execute(driver_command, params=None):
+            self.count += 1
+            return execute(driver_command, params)
+
+        driver.execute = counting_execute
+
+    def reset(self) -> int:
+        """Zera o contador e retorna o valor acumulado até aqui."""
+        used, self.count = self.count, 0
+        return used
+
+
+class PageRecord:
+    def __init__(self, run_id: str, scraper: str, page: int, url: str = "") -> None:
+        self.data: Dict[str, Any] = {
+            "run_id": run_id,
+            "scraper": scraper,
+            "page": page,
+            "url": url,
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "phases": {},
+        }
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Soma o tempo do bloco na fase `name` (segundos)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        phases = self.data["phases"]
+        phases[name] = round(phases.get(name, 0.0) + seconds, 4)
+
+    def set(self, **values: Any) -> None:
+        self.data.update(values)
+
+
+class MetricsWriter:
+    def __init__(self, path: str = DEFAULT_PATH, scraper: str = "scrape_skokka") -> None:
+        self.path = path
+        self.scraper = scraper
+        self.run_id = uuid.uuid4().hex[:12]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def page(self, page: int, url: str = "") -> PageRecord:
+        return PageRecord(self.run_id, self.scraper, page, url)
+
+    def write(self, record: PageRecord) -> None:
+        self._file.write(json.dumps(record.data, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def page_source_bytes(driver) -> Optional[int]:
+    """Tamanho (bytes UTF-8) do DOM atual, sem trazer o HTML inteiro pelo WebDriver."""
+    try:
+        return int(driver.execute_script(PAGE_SOURCE_BYTES_SCRIPT))
+    except Exception:
+        return None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil pelo vizinho mais próximo (0.0 para uma lista vazia)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def summarize(path: str, run_id: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """p50/p95/total por fase e por contador numérico."""
+    series: Dict[str, List[float]] = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if run_id and rec.get("run_id") != run_id:
+                continue
+            for name, seconds in rec.get("phases", {}).items():
+                series[f"phase:{name}"].append(float(seconds))
+            for key in ("anchors", "listings", "webdriver_commands", "page_source_bytes", "browser_rss_mb"):
+                if isinstance(rec.get(key), (int, float)):
+                    series[key].append(float(rec[key]))
+    return {
+        name: {
+            "n": len(vals),
+            "p50": percentile(vals, 50),
+            "p95": percentile(vals, 95),
+            "total": sum(vals),
+        }
+        for name, vals in series.items()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Resumo das métricas por página de uma coleta.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--run", default=None, help="filtra por run_id")
+    args = parser.parse_args(argv)
+
+    summary = summarize(args.path, args.run)
+    if not summary:
+        print("[info] Nenhum registro encontrado.")
+        return
+    print(f"{'métrica':<28}{'n':>6}{'p50':>12}{'p95':>12}{'total':>14}")
+    for name in sorted(summary, key=lambda n: (not n.startswith("phase:"), n)):
+        s = summary[name]
+        print(f"{name:<28}{s['n']:>6}{s['p50']:>12.3f}{s['p95']:>12.3f}{s['total']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Saída em streaming com checkpoint para coletas longas.
+
+Cada página é anexada ao arquivo assim que é extraída (e o arquivo é descarregado
+no disco), em seguida um checkpoint pequeno registra a última página concluída e
+a sua URL. Se a coleta cair, basta rodar de novo com --resume: o arquivo é
+continuado a partir do checkpoint em vez de recomeçar da página 1.
+
+Formatos (pela extensão): .csv, .jsonl e as variantes comprimidas .csv.gz e
+.jsonl.gz, além de .parquet (pyarrow): cada página vira um row group, todas as
+colunas usam dicionário e compressão zstd, e os metadados da execução (URL
+inicial, páginas, horários) vão nos metadados do arquivo. Um Parquet só fica
+legível depois de fechado e não pode ser continuado, então não tem checkpoint.
+Ao regravar a saída de uma coleta já encerrada, started_at, finished_at e pages
+recebem os valores da coleta original em vez dos da regravação.
+read_rows lê de volta qualquer um desses formatos.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+PARQUET_ROW_GROUP_ROWS = 50_000
+
+
+def _row_dict(row: Any) -> Dict[str, str]:
+    return row.as_dict() if hasattr(row, "as_dict") else dict(row)
+
+
+def open_text(path: str, mode: str = "r") -> IO[str]:
+    """Abre um .csv/.jsonl (com ou sem .gz) em texto UTF-8."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def read_rows(path: str) -> Iterator[Dict[str, str]]:
+    """Linhas (dicts) de um arquivo em qualquer formato do StreamingSink."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    base = path[:-3] if path.endswith(".gz") else path
+    if base.endswith(".jsonl"):
+        with open_text(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif base.endswith(".csv"):
+        with open_text(path) as f:
+            yield from csv.DictReader(f)
+    else:
+        raise ValueError(f"Formato de entrada não suportado: {path}")
+
+
+def checkpoint_path_for(path: str) -> str:
+    return f"{path}.checkpoint.json"
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """Lê o checkpoint do arquivo de saída (None se não houver)."""
+    try:
+        with open(checkpoint_path_for(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class StreamingSink:
+    def __init__(
+        self,
+        path: str,
+        fieldnames: List[str],
+        append: bool = False,
+        metadata: Optional[Dict[str, Any]] = None,
+        started_at: Optional[str] = None,
+        finished_at: Optional[str] = None,
+        pages: Optional[int] = None,
+    ) -> None:
+        self.path = path
+        self.fieldnames = fieldnames
+        self.metadata = dict(metadata or {})
+        self.pages_written = 0
+        self.pages = pages
+        self.started_at = started_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.finished_at = finished_at
+        self.compressed = path.endswith(".gz")
+        base = path[:-3] if self.compressed else path
+        if base.endswith(".jsonl"):
+            self.format = "jsonl"
+        elif base.endswith(".csv"):
+            self.format = "csv"
+        elif path.endswith(".parquet"):
+            self.format = "parquet"
+        else:
+            raise ValueError(f"Formato de saída não suportado: {path}")
+
+        self._writer = None
+        self.rows_written = 0
+        if self.format == "parquet":
+            if append:
+                raise ValueError("Arquivos Parquet não podem ser continuados; use .csv ou .jsonl com --resume")
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self._schema = pa.schema([(name, pa.string()) for name in fieldnames])
+            self._file = pq.ParquetWriter(path, self._schema, compression="zstd", use_dictionary=True)
+            return
+
+        mode = "a" if append else "w"
+        is_new = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        # Em modo append o gzip ganha um novo membro; leitores padrão concatenam
+        self._file = open_text(path, mode)
+        if self.format == "csv":
+            self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction="ignore")
+            if is_new:
+                self._writer.writeheader()
+        checkpoint = load_checkpoint(path) if append else None
+        self.rows_written = int(checkpoint.get("rows", 0)) if checkpoint else 0
+
+    def write_rows(self, rows: Iterable[Any]) -> int:
+        if self.format == "parquet":
+            return self._write_parquet(rows)
+        count = 0
+        for row in rows:
+            data = _row_dict(row)
+            if self.format == "csv":
+                self._writer.writerow(data)
+            else:
+                self._file.write(json.dumps(data, ensure_ascii=False) + "\n")
+            count += 1
+        self.flush()
+        self.rows_written += count
+        return count
+
+    def _write_parquet(self, rows: Iterable[Any]) -> int:
+        """Cada chamada gera ao menos um row group (uma página, no caso de write_page)."""
+        import pyarrow as pa
+
+        data = [_row_dict(row) for row in rows]
+        if not data:
+            return 0
+        columns = {name: [str(d.get(name) or "") for d in data] for name in self.fieldnames}
+        self._file.write_table(pa.Table.from_pydict(columns, schema=self._schema),
+                               row_group_size=PARQUET_ROW_GROUP_ROWS)
+        self.rows_written += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        if self.format == "parquet":
+            return
+        self._file.flush()
+        if not self.compressed:
+            os.fsync(self._file.fileno())
+
+    def write_page(
+        self,
+        page: int,
+        url: str,
+        rows: Iterable[Any],
+        next_url: Optional[str] = None,
+        retry: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Anexa as linhas da página e só então grava o checkpoint. retry: páginas
+        que falharam e ainda aguardam nova tentativa (retomadas com --resume).
+        """
+        count = self.write_rows(rows)
+        self.pages_written += 1
+        if self.format == "parquet":
+            return count
+        checkpoint = {
+            "page": page,
+            "url": url,
+            "next_url": next_url,
+            "retry": retry or [],
+            "rows": self.rows_written,
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        tmp = checkpoint_path_for(self.path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp, checkpoint_path_for(self.path))
+        return count
+
+    def finish(self) -> None:
+        """Fecha o arquivo e remove o checkpoint (coleta concluída)."""
+        self.close()
+        try:
+            os.remove(checkpoint_path_for(self.path))
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self.finished_at is None:
+            self.finished_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        if self.format == "parquet":
+            if self._file.is_open:
+                self._file.add_key_value_metadata({"crawl_run": json.dumps({
+                    **self.metadata,
+                    "pages": self.pages_written if self.pages is None else self.pages,
+                    "rows": self.rows_written,
+                    "started_at": self.started_at,
+                    "finished_at": self.finished_at,
+                }, ensure_ascii=False)})
+                self._file.close()
+            return
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "StreamingSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,141 @@
+"""
+Captura de artefatos de depuração (HTML + screenshot) fora da thread de coleta.
+
+Modos:
+- "always": captura em todos os pontos (comportamento antigo do save_debug)
+- "error": só quando algo deu errado (erro ou página sem anúncios)
+- "every_n": páginas 1, 1+N, 1+2N… além de todos os erros
+
+O page_source e o PNG são obtidos na thread da coleta (o WebDriver não é
+thread-safe), mas a compressão (HTML em .html.gz) e a escrita em disco ficam em
+uma thread de fundo. Um buffer circular mantém só as últimas K capturas no
+diretório; as mais antigas são apagadas.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import queue
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+MODES = ("always", "error", "every_n")
+
+
+class DebugCapture:
+    def __init__(
+        self,
+        directory: str = "debug",
+        mode: str = "always",
+        every_n: int = 10,
+        keep_last: Optional[int] = 200,
+        screenshots: bool = True,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Modo de captura inválido: {mode} (use {', '.join(MODES)})")
+        self.directory = directory
+        self.mode = mode
+        self.every_n = max(1, every_n)
+        self.keep_last = keep_last
+        self.screenshots = screenshots
+        os.makedirs(directory, exist_ok=True)
+
+        # prefixo -> arquivos gravados, em ordem de captura (o mais antigo primeiro)
+        self._ring: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._seed_ring()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=16)
+        self._thread = threading.Thread(target=self._writer, name="debug-capture", daemon=True)
+        self._thread.start()
+
+    def _seed_ring(self) -> None:
+        """Inclui no buffer as capturas de execuções anteriores (por data)."""
+        pattern = re.compile(r"^(?P<prefix>.+?)\.(html\.gz|html|png)$")
+        found = {}
+        for name in os.listdir(self.directory):
+            m = pattern.match(name)
+            if not m:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            entry = found.setdefault(m.group("prefix"), [mtime, []])
+            entry[0] = max(entry[0], mtime)
+            entry[1].append(path)
+        for prefix, (_, paths) in sorted(found.items(), key=lambda kv: kv[1][0]):
+            self._ring[prefix] = paths
+
+    def should_capture(self, page: int, error: bool = False) -> bool:
+        if error or self.mode == "always":
+            return True
+        if self.mode == "every_n":
+            return (page - 1) % self.every_n == 0
+        return False
+
+    def capture(self, driver, prefix: str, page: int = 1, error: bool = False) -> bool:
+        """Obtém HTML/screenshot agora e agenda a gravação. Retorna se capturou."""
+        if not self.should_capture(page, error):
+            return False
+        try:
+            source = driver.page_source
+        except Exception:
+            source = None
+        png = None
+        if self.screenshots:
+            try:
+                png = driver.get_screenshot_as_png()
+            except Exception:
+                png = None
+        if source is None and png is None:
+            return False
+        self._queue.put((prefix, source, png))
+        return True
+
+    def _writer(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as e:
+                print(f"[warn] Falha ao gravar captura de debug: {e.__class__.__name__}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, prefix: str, source: Optional[str], png: Optional[bytes]) -> None:
+        paths: List[str] = []
+        if source is not None:
+            path = os.path.join(self.directory, f"{prefix}.html.gz")
+            with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+                f.write(source)
+            paths.append(path)
+        if png is not None:
+            path = os.path.join(self.directory, f"{prefix}.png")
+            with open(path, "wb") as f:
+                f.write(png)
+            paths.append(path)
+
+        old = self._ring.pop(prefix, [])
+        self._ring[prefix] = sorted(set(old) | set(paths))
+        if self.keep_last is not None:
+            while len(self._ring) > self.keep_last:
+                _, stale = self._ring.popitem(last=False)
+                for p in stale:
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+
+    def flush(self) -> None:
+        """Espera todas as capturas pendentes serem gravadas."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
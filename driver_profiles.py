@@ -0,0 +1,151 @@
+"""
+Perfil de carregamento leve para o Chrome dos scrapers.
+
+Os scrapers só precisam do DOM e das URLs das imagens; imagens, fontes, CSS,
+vídeos e scripts de analytics/anúncios podem ser bloqueados via DevTools
+(Network.setBlockedURLs) e a navegação não precisa esperar os sub-recursos
+(page_load_strategy="eager").
+
+page_load_report() informa, por página, os bytes transferidos (a partir do log
+de performance do Chrome) e o tempo de carregamento (Navigation Timing), para
+comparar o perfil leve com o normal.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+BLOCKED_EXTENSIONS: List[str] = [
+    # Imagens (as URLs continuam nos atributos src/data-src do DOM)
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico",
+    # Fontes e estilos
+    "woff", "woff2", "ttf", "otf", "eot", "css",
+    # Mídia
+    "mp4", "webm", "m3u8", "mp3",
+]
+# Com e sem query string: assets de CDN costumam vir como foo.png?v=3
+BLOCKED_RESOURCE_PATTERNS: List[str] = [
+    pattern for ext in BLOCKED_EXTENSIONS for pattern in (f"*.{ext}", f"*.{ext}?*")
+]
+
+BLOCKED_HOST_PATTERNS: List[str] = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googlesyndication.com*",
+    "*doubleclick.net*",
+    "*adservice.google.*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*scorecardresearch.com*",
+    "*criteo.com*",
+    "*taboola.com*",
+    "*outbrain.com*",
+    "*onesignal.com*",
+]
+
+NAVIGATION_TIMING_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+if(!nav) return null;
+return {
+  dom_content_loaded_ms: Math.round(nav.domContentLoadedEventEnd),
+  load_ms: Math.round(nav.loadEventEnd || nav.domContentLoadedEventEnd),
+  document_bytes: nav.transferSize || 0
+};
+"""
+
+
+def apply_light_options(options: Options) -> None:
+    """Ajusta as opções antes de criar o driver: não espera sub-recursos nem baixa imagens."""
+    options.page_load_strategy = "eager"
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+    })
+
+
+LOW_MEMORY_ARGUMENTS: List[str] = [
+    "--renderer-process-limit=2",
+    "--process-per-site",
+    "--window-size=1024,768",
+    "--disk-cache-size=33554432",
+    "--media-cache-size=1048576",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-features=Translate,OptimizationHints,MediaRouter",
+    "--js-flags=--max-old-space-size=512",
+]
+
+
+def apply_low_memory_options(options: Options) -> None:
+    """Chrome enxuto para VMs pequenas: poucos renderers, janela menor e caches pequenos."""
+    for argument in LOW_MEMORY_ARGUMENTS:
+        options.add_argument(argument)
+
+
+def enable_performance_log(options: Options) -> None:
+    """Liga o log de performance do Chrome (necessário para page_load_report medir bytes)."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def enable_resource_blocking(driver: webdriver.Chrome, extra_patterns: List[str] = ()) -> None:
+    """Bloqueia recursos pesados e hosts de analytics/anúncios via DevTools."""
+    patterns = BLOCKED_RESOURCE_PATTERNS + BLOCKED_HOST_PATTERNS + list(extra_patterns)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except WebDriverException as e:
+        print(f"[warn] Não foi possível ativar o bloqueio de recursos: {e.__class__.__name__}")
+
+
+def read_performance_log(driver: webdriver.Chrome) -> List[Dict[str, Any]]:
+    """Entradas do log de performance desde a última leitura (a leitura as consome)."""
+    try:
+        return driver.get_log("performance")
+    except WebDriverException:
+        return []
+
+
+def page_load_report(
+    driver: webdriver.Chrome, entries: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, float]:
+    """
+    Bytes transferidos desde a última chamada (consome o log de performance) e os
+    tempos de carregamento do documento atual. entries: log já lido por outra
+    parte do código na mesma página (ex.: o modo xhr), para não medir zero.
+    """
+    report: Dict[str, float] = {"bytes": 0, "requests": 0, "blocked": 0}
+    if entries is None:
+        entries = read_performance_log(driver)
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method")
+        if method == "Network.loadingFinished":
+            report["bytes"] += message.get("params", {}).get("encodedDataLength", 0)
+            report["requests"] += 1
+        elif method == "Network.loadingFailed" and message.get("params", {}).get("blockedReason"):
+            report["blocked"] += 1
+    try:
+        timing = driver.execute_script(NAVIGATION_TIMING_SCRIPT)
+    except WebDriverException:
+        timing = None
+    if isinstance(timing, dict):
+        report.update(timing)
+    return report
+
+
+def format_load_report(report: Dict[str, float]) -> str:
+    mb = report.get("bytes", 0) / (1024 * 1024)
+    load = report.get("load_ms")
+    load_txt = f", carregamento {load / 1000:.2f}s" if load else ""
+    return (f"{mb:.2f} MB em {int(report.get('requests', 0))} requisições "
+            f"({int(report.get('blocked', 0))} bloqueadas){load_txt}")
@@ -0,0 +1,252 @@
+"""
+Análise de estrutura (ELEMENTOS_PAGINA) para vários sites de uma vez.
+
+Lê as URLs de um arquivo (uma por linha; linhas vazias e iniciadas por # são
+ignoradas) e/ou da linha de comando:
+- os downloads rodam com asyncio/aiohttp (http_fetch.run_bounded), com
+  concorrência total e por host limitadas e conexões reaproveitadas
+- cada página baixada vai direto para um pool de processos, que classifica os
+  elementos em todos os núcleos enquanto os outros downloads continuam
+- com o cache de páginas (page_cache), cada URL vai com If-None-Match/
+  If-Modified-Since; páginas não modificadas (304) reaproveitam o corpo e a
+  análise já feita, e --offline analisa só o que está em cache
+Ao final grava um relatório com uma linha por site (ocorrências por elemento e
+por propósito) e uma linha TOTAL, e imprime um resumo.
+
+Uso:
+    python elementos_lote.py --arquivo sites.txt --saida elementos_lote.csv
+    python elementos_lote.py https://www.uol.com.br/ https://g1.globo.com/ --backend stream
+    python elementos_lote.py --arquivo sites.txt --offline
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from crawl_sink import StreamingSink
+from ELEMENTOS_PAGINA import BACKENDS, REGRAS, Regras, analisar_html, carregar_regras, chave_analise
+from http_fetch import run_bounded
+from page_cache import CACHE_DIR, CachedPage, PageCache
+
+CABECALHOS = {"User-Agent": "Mozilla/5.0"}
+LINHA_TOTAL = "TOTAL"
+
+# Regras do processo filho, montadas uma vez no initializer do pool
+_regras_processo: Optional[Regras] = None
+
+
+def ler_urls(arquivos: Iterable[str], urls: Iterable[str] = ()) -> List[str]:
+    """URLs únicas (na ordem em que aparecem) dos arquivos e da linha de comando."""
+    vistas: Dict[str, None] = {}
+    for caminho in arquivos:
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                linha = linha.strip()
+                if linha and not linha.startswith("#"):
+                    vistas.setdefault(linha, None)
+    for url in urls:
+        vistas.setdefault(url.strip(), None)
+    return [u for u in vistas if u]
+
+
+def _iniciar_processo(tabela: Dict[str, Any]) -> None:
+    global _regras_processo
+    _regras_processo = Regras(tabela)
+
+
+def classificar_pagina(corpo: bytes, backend: str, encoding: Optional[str]) -> Dict[str, Dict[str, int]]:
+    """Roda no pool: contagens {tag: {propósito: n}} como dicts simples (serializáveis)."""
+    contagens = analisar_html(corpo, _regras_processo, backend, encoding)
+    return {tag: dict(propositos) for tag, propositos in contagens.items()}
+
+
+async def _analisar_todos(
+    urls: List[str],
+    pool: ProcessPoolExecutor,
+    backend: str,
+    concorrencia: int,
+    por_host: int,
+    timeout: float,
+    cache: Optional[PageCache],
+    offline: bool,
+    chave: str,
+) -> Dict[str, Dict[str, Any]]:
+    resultados: Dict[str, Dict[str, Any]] = {}
+    loop = asyncio.get_running_loop()
+
+    async def analisar(sessao: aiohttp.ClientSession, url: str) -> None:
+        inicio = time.perf_counter()
+        pagina: Optional[CachedPage] = await asyncio.to_thread(cache.get, url) if cache else None
+        corpo: Optional[bytes] = None
+        encoding: Optional[str] = None
+        if offline and pagina is None:
+            resultados[url] = {"erro": "CacheMiss", "bytes": 0}
+            print(f"[warn] {url} não está no cache; ignorada no modo offline.")
+            return
+        try:
+            if offline:
+                cache.used_offline(pagina)
+            else:
+                async with sessao.get(url, headers=cache.validators(pagina) if cache else None) as resp:
+                    if resp.status == 304 and pagina is not None:
+                        cache.revalidated(pagina, resp.headers)
+                    else:
+                        resp.raise_for_status()
+                        corpo = await resp.read()
+                        # Sem charset no cabeçalho, o parser detecta pelo <meta charset>
+                        encoding = resp.charset
+                        if cache:
+                            pagina = await asyncio.to_thread(cache.store, url, corpo, resp.headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            resultados[url] = {"erro": e.__class__.__name__, "bytes": 0}
+            print(f"[warn] Falha ao baixar {url}: {e.__class__.__name__}")
+            return
+        tempo = time.perf_counter() - inicio
+        do_cache = corpo is None
+        contagens = cache.analysis(pagina, chave) if do_cache else None
+        if contagens is None:
+            if corpo is None:
+                corpo = await asyncio.to_thread(cache.body, pagina)
+                encoding = pagina.encoding
+            try:
+                contagens = await loop.run_in_executor(pool, classificar_pagina, corpo, backend, encoding)
+            except Exception as e:
+                resultados[url] = {"erro": e.__class__.__name__, "bytes": len(corpo)}
+                print(f"[warn] Falha ao analisar {url}: {e.__class__.__name__}")
+                return
+            if pagina is not None:
+                await asyncio.to_thread(cache.store_analysis, pagina, chave, contagens)
+        tamanho = len(corpo) if corpo is not None else pagina.size
+        resultados[url] = {"contagens": contagens, "bytes": tamanho, "tempo_s": tempo}
+        origem = ", do cache" if do_cache else ""
+        print(f"[info] {url}: {sum(sum(p.values()) for p in contagens.values())} ocorrências "
+              f"({tamanho / 1024:.0f} KB em {tempo:.1f}s{origem})")
+
+    await run_bounded(urls, analisar, concorrencia, por_host, timeout, headers=CABECALHOS)
+    return resultados
+
+
+def analisar_sites(
+    urls: List[str],
+    regras: Optional[Regras] = None,
+    backend: str = "html.parser",
+    concorrencia: int = 16,
+    por_host: int = 4,
+    timeout: float = 30.0,
+    processos: Optional[int] = None,
+    cache: Optional[PageCache] = None,
+    offline: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    {url: {"contagens": {tag: {propósito: n}}, "bytes": n} ou {"erro": ...}} na
+    ordem das URLs. offline=True exige cache e não acessa a rede.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend desconhecido: {backend} (use um de {', '.join(BACKENDS)})")
+    if offline and cache is None:
+        raise ValueError("o modo offline precisa do cache de páginas")
+    tabela = (regras or REGRAS).tabela
+    chave = chave_analise(backend, regras)
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo, initargs=(tabela,)) as pool:
+        resultados = asyncio.run(_analisar_todos(urls, pool, backend, concorrencia, por_host, timeout,
+                                                 cache, offline, chave))
+    return {url: resultados[url] for url in urls if url in resultados}
+
+
+def linhas_relatorio(resultados: Dict[str, Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """(colunas, linhas): uma linha por site com ocorrências por elemento e por propósito, mais TOTAL."""
+    total_elementos: Counter = Counter()
+    total_propositos: Counter = Counter()
+    linhas: List[Dict[str, Any]] = []
+    for url, resultado in resultados.items():
+        linha: Dict[str, Any] = {"url": url, "erro": resultado.get("erro", ""), "bytes": resultado.get("bytes", 0)}
+        elementos: Counter = Counter()
+        propositos: Counter = Counter()
+        for tag, contagens in resultado.get("contagens", {}).items():
+            for proposito, n in contagens.items():
+                elementos[tag] += n
+                propositos[proposito] += n
+        linha["ocorrencias"] = sum(elementos.values())
+        linha.update({f"elemento:{t}": n for t, n in elementos.items()})
+        linha.update({f"proposito:{p}": n for p, n in propositos.items()})
+        total_elementos.update(elementos)
+        total_propositos.update(propositos)
+        linhas.append(linha)
+
+    total: Dict[str, Any] = {
+        "url": LINHA_TOTAL,
+        "erro": str(sum(1 for r in linhas if r["erro"])),
+        "bytes": sum(r["bytes"] for r in linhas),
+        "ocorrencias": sum(total_elementos.values()),
+    }
+    total.update({f"elemento:{t}": n for t, n in total_elementos.items()})
+    total.update({f"proposito:{p}": n for p, n in total_propositos.items()})
+    linhas.append(total)
+
+    colunas = ["url", "erro", "bytes", "ocorrencias"]
+    # Mais frequentes primeiro; empates por nome, para não depender da ordem dos downloads
+    colunas += [f"proposito:{p}" for p in sorted(total_propositos, key=lambda p: (-total_propositos[p], p))]
+    colunas += [f"elemento:{t}" for t in sorted(total_elementos, key=lambda t: (-total_elementos[t], t))]
+    for linha in linhas:
+        for nome in colunas[4:]:
+            linha.setdefault(nome, 0)
+    return colunas, linhas
+
+
+def imprimir_resumo(linhas: List[Dict[str, Any]], tempo: float) -> None:
+    total = linhas[-1]
+    ok = len(linhas) - 1 - int(total["erro"])
+    mb = int(total["bytes"]) / (1024 * 1024)
+    print(f"\n[info] {ok} sites analisados, {total['erro']} falhas, {mb:.1f} MB em {tempo:.1f}s.")
+    print(f"[info] {total['ocorrencias']} ocorrências no total.")
+    propositos = [(k.split(":", 1)[1], v) for k, v in total.items() if k.startswith("proposito:") and v]
+    for proposito, n in sorted(propositos, key=lambda x: x[1], reverse=True):
+        print(f"  → {proposito}: {n}x ({n / max(int(total['ocorrencias']), 1) * 100:.1f}%)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Análise de elementos de vários sites em lote.")
+    parser.add_argument("urls", nargs="*", help="URLs a analisar (além das de --arquivo)")
+    parser.add_argument("--arquivo", action="append", default=[], help="arquivo com uma URL por linha")
+    parser.add_argument("--saida", default="elementos_lote.csv",
+                        help="relatório (.csv/.jsonl/.parquet, com ou sem .gz)")
+    parser.add_argument("--backend", choices=BACKENDS, default="html.parser")
+    parser.add_argument("--regras", default=os.environ.get("ELEMENTOS_REGRAS"), help="JSON de regras de propósito")
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--por-host", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--processos", type=int, default=None, help="processos de análise (padrão: núcleos)")
+    parser.add_argument("--cache", default=CACHE_DIR, help="pasta do cache de páginas")
+    parser.add_argument("--sem-cache", action="store_true", help="sempre baixa tudo, sem requisição condicional")
+    parser.add_argument("--offline", action="store_true", help="analisa só as páginas em cache, sem rede")
+    args = parser.parse_args(argv)
+    if args.offline and args.sem_cache:
+        parser.error("--offline não combina com --sem-cache")
+
+    urls = ler_urls(args.arquivo, args.urls)
+    if not urls:
+        parser.error("nenhuma URL informada (use URLs posicionais ou --arquivo)")
+    print(f"[info] {len(urls)} sites para analisar.")
+    inicio = time.perf_counter()
+    cache = None if args.sem_cache else PageCache(args.cache)
+    resultados = analisar_sites(urls, carregar_regras(args.regras), args.backend, args.concorrencia,
+                                args.por_host, args.timeout, args.processos, cache, args.offline)
+    colunas, linhas = linhas_relatorio(resultados)
+    with StreamingSink(args.saida, colunas, metadata={"tool": "elementos_lote", "backend": args.backend}) as sink:
+        sink.write_rows(linhas)
+    imprimir_resumo(linhas, time.perf_counter() - inicio)
+    if cache:
+        cache.print_summary()
+    print(f"[info] Relatório salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
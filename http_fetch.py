@@ -0,0 +1,206 @@
+"""
+Camada de busca HTTP-first com fallback para o navegador.
+
+Cada página é pedida primeiro por uma requests.Session com pool de conexões
+(keep-alive). Se o HTML servido já contém o seletor de conteúdo (ex.: as
+âncoras a[href*='/anuncio/']), ele é usado diretamente. Só quando a resposta
+simples não traz o conteúdo é que um WebDriver é iniciado (uma única vez, sob
+demanda) para renderizar a página.
+
+Cada página fica registrada com o caminho usado (http/browser) e o tempo gasto,
+para medir quanto tempo de navegador o caminho HTTP economiza.
+
+run_bounded é a base dos downloads em lote com asyncio/aiohttp (imagens,
+análise de vários sites): concorrência total e por host limitadas e conexões
+reaproveitadas numa única ClientSession.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+import aiohttp
+import requests
+from cssselect import HTMLTranslator
+from lxml import etree, html
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from urllib3.util.retry import Retry
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+def create_session(pool_size: int = 10, retries: int = 2) -> requests.Session:
+    """Session com keep-alive, pool de conexões e os mesmos cabeçalhos do Chrome."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def html_has_selector(source: str, css: str) -> bool:
+    """True se o HTML contém ao menos um elemento que casa com o seletor CSS."""
+    if not source or not source.strip():
+        return False
+    try:
+        doc = html.fromstring(source)
+    except (etree.ParserError, ValueError):
+        return False
+    return bool(doc.xpath(HTMLTranslator().css_to_xpath(css)))
+
+
+@dataclass
+class FetchResult:
+    url: str
+    html: str
+    path: str  # "http" ou "browser"
+    elapsed: float
+    status: Optional[int] = None
+
+
+@dataclass
+class PageFetcher:
+    """
+    Busca páginas tentando HTTP simples antes do navegador.
+
+    content_selector: seletor CSS que indica que a página já tem o conteúdo.
+    driver_factory: cria o WebDriver pronto para uso (pop-ups já tratados).
+    """
+
+    content_selector: str
+    driver_factory: Callable[[], Any]
+    timeout: float = 15.0
+    browser_wait: float = 20.0
+    session: requests.Session = field(default_factory=create_session)
+    records: List[FetchResult] = field(default_factory=list)
+    _driver: Optional[Any] = field(default=None, init=False, repr=False)
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            print("[info] Conteúdo ausente no HTML simples; iniciando navegador…")
+            self._driver = self.driver_factory()
+        return self._driver
+
+    @property
+    def active_driver(self):
+        """O WebDriver, se já foi iniciado (não inicia um novo)."""
+        return self._driver
+
+    def html_has_content(self, source: str) -> bool:
+        return html_has_selector(source, self.content_selector)
+
+    def _fetch_http(self, url: str) -> Optional[FetchResult]:
+        start = time.perf_counter()
+        try:
+            resp = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"[warn] HTTP falhou para {url}: {e.__class__.__name__}")
+            return None
+        if "charset" not in resp.headers.get("Content-Type", "").lower():
+            # Sem charset no cabeçalho o requests assume ISO-8859-1
+            resp.encoding = resp.apparent_encoding
+        if resp.ok and self.html_has_content(resp.text):
+            return FetchResult(url, resp.text, "http", time.perf_counter() - start, resp.status_code)
+        return None
+
+    def _fetch_browser(self, url: str) -> FetchResult:
+        start = time.perf_counter()
+        driver = self.driver
+        driver.get(url)
+        try:
+            WebDriverWait(driver, self.browser_wait).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, self.content_selector))
+            )
+        except TimeoutException:
+            pass
+        return FetchResult(url, driver.page_source, "browser", time.perf_counter() - start)
+
+    def fetch(self, url: str) -> FetchResult:
+        result = self._fetch_http(url) or self._fetch_browser(url)
+        self.records.append(result)
+        print(f"  – página obtida via {result.path} em {result.elapsed:.2f}s")
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for r in self.records:
+            s = out.setdefault(r.path, {"pages": 0, "seconds": 0.0})
+            s["pages"] += 1
+            s["seconds"] += r.elapsed
+        return out
+
+    def print_summary(self) -> None:
+        stats = self.stats()
+        for path in ("http", "browser"):
+            s = stats.get(path)
+            if s:
+                print(f"[info] {path}: {s['pages']} páginas em {s['seconds']:.1f}s "
+                      f"({s['seconds'] / s['pages']:.2f}s/página)")
+        http, browser = stats.get("http"), stats.get("browser")
+        if http and browser:
+            saved = http["pages"] * (browser["seconds"] / browser["pages"]) - http["seconds"]
+            print(f"[info] Tempo de navegador economizado pelo caminho HTTP: ~{saved:.1f}s")
+
+    def close(self) -> None:
+        self.session.close()
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+
+
+async def run_bounded(
+    urls: List[str],
+    handle: Callable[[aiohttp.ClientSession, str], Awaitable[None]],
+    concurrency: int = 16,
+    per_host: int = 4,
+    timeout: float = 30.0,
+    headers: Optional[Mapping[str, str]] = None,
+) -> None:
+    """
+    Chama handle(session, url) para cada URL com no máximo `concurrency` ao mesmo
+    tempo (e `per_host` por host), numa sessão com pool de conexões. Os erros de
+    cada URL ficam a cargo de handle; um erro que escape dele encerra o lote.
+    """
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=client_timeout, headers=dict(headers or {"User-Agent": USER_AGENT})
+    ) as session:
+
+        async def worker() -> None:
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await handle(session, url)
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(urls)) or 1)))
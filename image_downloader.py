@@ -0,0 +1,216 @@
+"""
+Download concorrente das imagens dos anúncios com cache endereçado por conteúdo.
+
+Lê as URLs de imagem dos arquivos gerados pelos scrapers (coluna image_url do
+skokka_listings.csv ou image_src do vivalocal_images.csv; CSV ou JSON Lines,
+com ou sem .gz, ou Parquet) e baixa tudo com asyncio/aiohttp:
+- concorrência total limitada e limite por host, reaproveitando conexões
+- cada arquivo é salvo pelo SHA-256 do conteúdo (images/ab/abcd….jpg), então
+  imagens repetidas entre páginas e execuções ocupam espaço uma vez só
+- um índice SQLite (images/index.db) guarda URL -> hash; URLs já baixadas são
+  puladas nas próximas execuções
+Ao final imprime vazão, latência (p50/p95) e totais por host.
+
+Uso:
+    python image_downloader.py skokka_listings.csv vivalocal_images.csv --out images
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from crawl_metrics import percentile
+from crawl_sink import read_rows
+from http_fetch import run_bounded
+
+IMAGE_COLUMNS = ("image_url", "image_src")
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/avif": ".avif",
+    "image/svg+xml": ".svg",
+}
+
+
+def read_image_urls(paths: Iterable[str], base_url: str = "https://br.skokka.com/") -> List[str]:
+    """URLs de imagem únicas (na ordem em que aparecem) dos arquivos de saída."""
+    seen: Dict[str, None] = {}
+    for path in paths:
+        for row in read_rows(path):
+            for col in IMAGE_COLUMNS:
+                url = (row.get(col) or "").strip()
+                if not url or url.startswith("data:"):
+                    continue
+                url = urljoin(base_url, url)
+                if urlparse(url).scheme in ("http", "https"):
+                    seen.setdefault(url, None)
+    return list(seen)
+
+
+class ImageCache:
+    """Arquivos por hash de conteúdo + índice URL -> hash em SQLite."""
+
+    def __init__(self, root: str = "images") -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # store() roda em threads do asyncio.to_thread; o lock serializa o acesso
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                fetched_at TEXT NOT NULL
+            )
+            """
+        )
+
+    def known_urls(self) -> set:
+        return {row[0] for row in self.conn.execute("SELECT url FROM images")}
+
+    def store(self, url: str, body: bytes, content_type: str) -> Tuple[str, bool]:
+        """Grava o conteúdo (se ainda não existir) e indexa a URL. Retorna (caminho, novo)."""
+        digest = hashlib.sha256(body).hexdigest()
+        ext = EXTENSIONS.get(content_type.split(";")[0].strip().lower(), "")
+        if not ext:
+            ext = os.path.splitext(urlparse(url).path)[1].lower()[:5]
+        path = os.path.join(self.root, digest[:2], digest + ext)
+        created = False
+        if not os.path.exists(path):
+            # Dois downloads do mesmo conteúdo podem chegar aqui juntos; o os.replace
+            # de um sobre o outro é inofensivo (mesmos bytes)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+            created = True
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO images (url, sha256, path, size, content_type, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, digest, path, len(body), content_type,
+                 datetime.now(timezone.utc).isoformat(timespec="seconds")),
+            )
+        return path, created
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _empty_stats() -> Dict[str, object]:
+    return {
+        "ok": 0, "new_files": 0, "failed": 0, "bytes": 0,
+        "latencies": [], "hosts": Counter(), "errors": Counter(),
+    }
+
+
+async def _download_all(
+    urls: List[str],
+    cache: ImageCache,
+    concurrency: int,
+    per_host: int,
+    timeout: float,
+) -> Dict[str, object]:
+    stats = _empty_stats()
+
+    async def download(session: aiohttp.ClientSession, url: str) -> None:
+        host = urlparse(url).netloc
+        start = time.perf_counter()
+        try:
+            async with session.get(url) as resp:
+                resp.raise_for_status()
+                body = await resp.read()
+                content_type = resp.headers.get("Content-Type", "")
+            _, created = await asyncio.to_thread(cache.store, url, body, content_type)
+            stats["latencies"].append(time.perf_counter() - start)
+            stats["ok"] += 1
+            stats["new_files"] += int(created)
+            stats["bytes"] += len(body)
+            stats["hosts"][host] += 1
+        except Exception as e:
+            # Erro de rede, de disco (store) ou qualquer outro: só esta URL falha
+            stats["failed"] += 1
+            stats["errors"][e.__class__.__name__] += 1
+
+    await run_bounded(urls, download, concurrency, per_host, timeout)
+    return stats
+
+
+def download_images(
+    urls: List[str],
+    root: str = "images",
+    concurrency: int = 32,
+    per_host: int = 8,
+    timeout: float = 30.0,
+) -> Dict[str, object]:
+    """Baixa as URLs ainda não indexadas e retorna as estatísticas da execução."""
+    cache = ImageCache(root)
+    try:
+        known = cache.known_urls()
+        pending = [u for u in urls if u not in known]
+        start = time.perf_counter()
+        if pending:
+            stats = asyncio.run(_download_all(pending, cache, concurrency, per_host, timeout))
+        else:
+            stats = _empty_stats()
+        stats["elapsed"] = time.perf_counter() - start
+        stats["skipped"] = len(urls) - len(pending)
+        return stats
+    finally:
+        cache.close()
+
+
+def print_summary(stats: Dict[str, object]) -> None:
+    elapsed = max(float(stats["elapsed"]), 1e-9)
+    latencies: List[float] = stats["latencies"]  # type: ignore[assignment]
+    mb = int(stats["bytes"]) / (1024 * 1024)
+    print(f"[info] {stats['ok']} imagens baixadas ({stats['new_files']} arquivos novos), "
+          f"{stats['skipped']} já em cache, {stats['failed']} falhas.")
+    print(f"[info] {mb:.1f} MB em {elapsed:.1f}s: {mb / elapsed:.2f} MB/s, "
+          f"{int(stats['ok']) / elapsed:.1f} imagens/s.")
+    if latencies:
+        print(f"[info] Latência p50 {percentile(latencies, 50) * 1000:.0f} ms, "
+              f"p95 {percentile(latencies, 95) * 1000:.0f} ms.")
+    for host, n in stats["hosts"].most_common():  # type: ignore[union-attr]
+        print(f"  – {host}: {n}")
+    for err, n in stats["errors"].most_common():  # type: ignore[union-attr]
+        print(f"  – erro {err}: {n}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Baixa as imagens dos anúncios coletados.")
+    parser.add_argument("inputs", nargs="+", help="arquivos .csv/.jsonl(.gz) ou .parquet gerados pelos scrapers")
+    parser.add_argument("--out", default="images")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--base-url", default="https://br.skokka.com/")
+    args = parser.parse_args(argv)
+
+    urls = read_image_urls(args.inputs, base_url=args.base_url)
+    print(f"[info] {len(urls)} URLs de imagem únicas encontradas.")
+    stats = download_images(urls, args.out, args.concurrency, args.per_host, args.timeout)
+    print_summary(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Delta entre duas coletas: anúncios adicionados, removidos e alterados.
+
+Compara a coleta atual (skokka_listings.csv, vivalocal_images.csv, .jsonl,
+.parquet ou .gz) com o snapshot da execução anterior. Cada linha é identificada pela chave
+(link; image_src no vivalocal_images.csv) e comparada por um hash do conteúdo
+das demais colunas. Só as diferenças vão para o arquivo de delta, uma linha
+por anúncio com a operação ("added", "removed", "changed") e, nas alteradas,
+as colunas que mudaram.
+
+Para a memória não crescer com o número de anúncios, os dois arquivos são lidos
+em streaming e particionados por hash da chave em arquivos temporários; cada
+partição é comparada isoladamente (só uma partição de cada lado fica em memória).
+O número de partições sai do tamanho descomprimido estimado das entradas: .gz
+conta GZIP_EXPANSION vezes o tamanho em disco e .parquet multiplica o número
+de linhas do rodapé pelo tamanho médio (em JSON) de uma amostra das linhas.
+
+Uso (o snapshot anterior fica em snapshots/ e é substituído pela coleta atual):
+    python listing_delta.py skokka_listings.csv vivalocal_images.csv
+Comparando dois arquivos quaisquer:
+    python listing_delta.py novo.csv --old antigo.csv --out delta.jsonl.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from crawl_sink import StreamingSink, read_rows
+
+KEY_COLUMNS = ("link", "image_src")
+PARTITION_BYTES = 64 * 1024 * 1024
+PARQUET_SAMPLE_ROWS = 1000
+# Razão típica de compressão de CSV/JSON Lines de anúncios em gzip
+GZIP_EXPANSION = 8
+MAX_PARTITIONS = 256
+SNAPSHOT_DIR = "snapshots"
+DELTA_DIR = "deltas"
+
+
+def detect_key(path: str) -> str:
+    """Primeira coluna de KEY_COLUMNS presente no arquivo."""
+    for row in read_rows(path):
+        for col in KEY_COLUMNS:
+            if col in row:
+                return col
+        break
+    return KEY_COLUMNS[0]
+
+
+def row_hash(row: Dict[str, str], key: str) -> str:
+    payload = "\x1f".join(f"{k}\x1e{row.get(k) or ''}" for k in sorted(row) if k != key)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _partition_of(key_value: str, partitions: int) -> int:
+    return int(hashlib.md5(key_value.encode("utf-8")).hexdigest()[:8], 16) % partitions
+
+
+def _partition_file(path: str, key: str, directory: str, prefix: str, partitions: int) -> int:
+    """Espalha as linhas em `partitions` arquivos temporários pela chave; retorna as linhas sem chave."""
+    files = [
+        open(os.path.join(directory, f"{prefix}_{i:03d}.jsonl"), "w", encoding="utf-8")
+        for i in range(partitions)
+    ]
+    without_key = 0
+    try:
+        for row in read_rows(path):
+            key_value = (row.get(key) or "").strip()
+            if not key_value:
+                without_key += 1
+                continue
+            i = _partition_of(key_value, partitions)
+            files[i].write(json.dumps([key_value, row_hash(row, key), row], ensure_ascii=False) + "\n")
+    finally:
+        for f in files:
+            f.close()
+    return without_key
+
+
+def _read_partition(path: str) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            key_value, digest, row = json.loads(line)
+            yield key_value, digest, row
+
+
+def _uncompressed_bytes(path: str) -> int:
+    """Tamanho estimado dos dados descomprimidos (é o que vai para a memória numa partição)."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        # Dicionário + zstd: os tamanhos do rodapé ficam muito abaixo do das linhas
+        parquet = pq.ParquetFile(path)
+        total = parquet.metadata.num_rows
+        if not total:
+            return 0
+        sample = next(parquet.iter_batches(batch_size=PARQUET_SAMPLE_ROWS)).to_pylist()
+        average = sum(len(json.dumps(row, ensure_ascii=False)) for row in sample) / len(sample)
+        return int(total * average)
+    size = os.path.getsize(path)
+    return size * GZIP_EXPANSION if path.endswith(".gz") else size
+
+
+def _auto_partitions(*paths: str) -> int:
+    size = sum(_uncompressed_bytes(p) for p in paths if os.path.exists(p))
+    return max(1, min(MAX_PARTITIONS, -(-size // PARTITION_BYTES)))
+
+
+def compute_delta(
+    old_path: Optional[str],
+    new_path: str,
+    out_path: str,
+    key: Optional[str] = None,
+    partitions: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Grava em out_path só as linhas adicionadas, removidas e alteradas e retorna
+    as contagens. Sem old_path (primeira execução), tudo é "added". Chaves
+    repetidas num mesmo arquivo: vale a última ocorrência.
+    """
+    key = key or detect_key(new_path)
+    paths = [new_path] + ([old_path] if old_path else [])
+    partitions = partitions or _auto_partitions(*paths)
+    fieldnames: List[str] = ["op", "changed_fields"]
+    for row in read_rows(new_path):
+        fieldnames += [k for k in row if k not in fieldnames]
+        break
+
+    counts = {"added": 0, "removed": 0, "changed": 0, "unchanged": 0}
+    with tempfile.TemporaryDirectory(prefix="delta_") as tmp:
+        counts["without_key"] = _partition_file(new_path, key, tmp, "new", partitions)
+        if old_path:
+            _partition_file(old_path, key, tmp, "old", partitions)
+        sink = StreamingSink(out_path, fieldnames)
+        try:
+            for i in range(partitions):
+                old: Dict[str, Tuple[str, Dict[str, str]]] = {}
+                old_file = os.path.join(tmp, f"old_{i:03d}.jsonl")
+                if old_path:
+                    for key_value, digest, row in _read_partition(old_file):
+                        old[key_value] = (digest, row)
+
+                latest: Dict[str, Tuple[str, Dict[str, str]]] = {}
+                for key_value, digest, row in _read_partition(os.path.join(tmp, f"new_{i:03d}.jsonl")):
+                    latest[key_value] = (digest, row)
+
+                out: List[Dict[str, str]] = []
+                for key_value, (digest, row) in latest.items():
+                    previous = old.pop(key_value, None)
+                    if previous is None:
+                        out.append({"op": "added", "changed_fields": "", **row})
+                        counts["added"] += 1
+                    elif previous[0] != digest:
+                        changed = [k for k in row if k != key and row.get(k) != previous[1].get(k)]
+                        out.append({"op": "changed", "changed_fields": ",".join(changed), **row})
+                        counts["changed"] += 1
+                    else:
+                        counts["unchanged"] += 1
+                for key_value, (_, row) in old.items():
+                    out.append({"op": "removed", "changed_fields": "", **row})
+                    counts["removed"] += 1
+                sink.write_rows(out)
+        finally:
+            sink.close()
+    return counts
+
+
+def snapshot_path_for(path: str, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, os.path.basename(path))
+
+
+def delta_path_for(path: str, delta_dir: str = DELTA_DIR) -> str:
+    name = os.path.basename(path)
+    for ext in (".gz", ".csv", ".jsonl", ".parquet"):
+        if name.endswith(ext):
+            name = name[: -len(ext)]
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return os.path.join(delta_dir, f"{name}.{stamp}.delta.jsonl.gz")
+
+
+def rotate_snapshot(path: str, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    """Copia a coleta atual para o snapshot (substituição atômica)."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    target = snapshot_path_for(path, snapshot_dir)
+    tmp = f"{target}.tmp"
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, target)
+    return target
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Delta (adicionados/removidos/alterados) entre coletas.")
+    parser.add_argument("inputs", nargs="+", help="coletas atuais (.csv/.jsonl, com ou sem .gz, ou .parquet)")
+    parser.add_argument("--old", default=None, help="arquivo anterior (só com uma entrada); padrão: snapshot")
+    parser.add_argument("--out", default=None, help="arquivo de delta (só com uma entrada)")
+    parser.add_argument("--key", default=None, help="coluna chave (padrão: link ou image_src)")
+    parser.add_argument("--partitions", type=int, default=None, help="partições por hash (padrão: automático)")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--delta-dir", default=DELTA_DIR)
+    parser.add_argument("--no-rotate", action="store_true", help="não atualiza o snapshot com a coleta atual")
+    args = parser.parse_args(argv)
+    if len(args.inputs) > 1 and (args.old or args.out):
+        parser.error("--old/--out só podem ser usados com um único arquivo de entrada")
+
+    for path in args.inputs:
+        old = args.old or snapshot_path_for(path, args.snapshot_dir)
+        if not os.path.exists(old):
+            print(f"[info] Sem snapshot anterior para '{path}'; todas as linhas entram como adicionadas.")
+            old = None
+        out = args.out or delta_path_for(path, args.delta_dir)
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        counts = compute_delta(old, path, out, key=args.key, partitions=args.partitions)
+        print(f"[info] {path}: {counts['added']} adicionados, {counts['removed']} removidos, "
+              f"{counts['changed']} alterados, {counts['unchanged']} inalterados -> {out}")
+        if not args.old and not args.no_rotate:
+            rotate_snapshot(path, args.snapshot_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Armazenamento persistente (SQLite) dos anúncios coletados.
+
+Cada anúncio é identificado pelo link e guarda first_seen/last_seen e um hash do
+conteúdo (título, descrição e imagem). A cada página o scraper informa o que
+extraiu; se a página inteira já era conhecida com o mesmo hash, a coleta pode
+parar ali (refresh incremental).
+
+A coluna listed marca o que está anunciado agora. Ao fim de uma coleta
+(finish_run), os anúncios vistos nela ficam listados; os demais só deixam de
+estar listados se a coleta percorreu a paginação inteira (mark_complete). Numa
+parada incremental as páginas não visitadas mantêm o estado anterior. A coluna
+page guarda a página em que o anúncio foi visto por último, para que a saída
+final possa ser regravada página a página (listings_by_page).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from scrape_skokka import Listing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    link TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    image_url TEXT NOT NULL,
+    image_alt TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    listed INTEGER NOT NULL DEFAULT 1,
+    page INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_listings_last_seen ON listings(last_seen);
+"""
+
+
+def content_hash(listing: Listing) -> str:
+    payload = "\x1f".join((listing.title, listing.description, listing.image_url))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass
+class PageDiff:
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+
+    @property
+    def all_unchanged(self) -> bool:
+        """True quando a página tinha anúncios e todos já eram conhecidos e iguais."""
+        return self.unchanged > 0 and self.new == 0 and self.changed == 0
+
+
+class ListingStore:
+    def __init__(self, path: str = "skokka_listings.db") -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(listings)")}
+        if "listed" not in columns:
+            # Bancos anteriores à coluna: tudo o que existia conta como listado
+            with self.conn:
+                self.conn.execute("ALTER TABLE listings ADD COLUMN listed INTEGER NOT NULL DEFAULT 1")
+        if "page" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE listings ADD COLUMN page INTEGER")
+        self.run_started: Optional[str] = None
+        self.complete = False
+        self.run_pages: Set[int] = set()
+
+    def begin_run(self) -> None:
+        """Marca o início de uma coleta (referência para finish_run)."""
+        self.run_started = _now()
+        self.complete = False
+        self.run_pages = set()
+
+    def mark_complete(self) -> None:
+        """A coleta percorreu todas as páginas: o que não foi visto saiu do ar."""
+        self.complete = True
+
+    def finish_run(self) -> int:
+        """Atualiza a coluna listed ao fim da coleta; retorna quantos anúncios deixaram de estar listados."""
+        if self.run_started is None or not self.complete:
+            return 0
+        with self.conn:
+            cur = self.conn.execute(
+                "UPDATE listings SET listed = 0 WHERE listed = 1 AND last_seen < ?", (self.run_started,)
+            )
+        return cur.rowcount
+
+    def record_page(self, listings: Iterable[Listing], page: Optional[int] = None) -> PageDiff:
+        """Grava os anúncios da página (número page) e informa quantos são novos/alterados."""
+        if page is not None:
+            self.run_pages.add(page)
+        by_link: Dict[str, Listing] = {}
+        for listing in listings:
+            if listing.link:
+                by_link[listing.link] = listing
+        diff = PageDiff()
+        if not by_link:
+            return diff
+
+        placeholders = ",".join("?" * len(by_link))
+        known = dict(self.conn.execute(
+            f"SELECT link, content_hash FROM listings WHERE link IN ({placeholders})",
+            list(by_link),
+        ))
+
+        now = _now()
+        rows = []
+        for link, listing in by_link.items():
+            h = content_hash(listing)
+            if link not in known:
+                diff.new += 1
+            elif known[link] != h:
+                diff.changed += 1
+            else:
+                diff.unchanged += 1
+            rows.append((link, listing.title, listing.description, listing.image_url,
+                         listing.image_alt, h, now, now, page))
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO listings (link, title, description, image_url, image_alt,
+                                      content_hash, first_seen, last_seen, page, listed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT(link) DO UPDATE SET
+                    listed = 1,
+                    page = excluded.page,
+                    title = excluded.title,
+                    description = excluded.description,
+                    image_url = excluded.image_url,
+                    image_alt = excluded.image_alt,
+                    content_hash = excluded.content_hash,
+                    last_seen = excluded.last_seen
+                """,
+                rows,
+            )
+        return diff
+
+    def listings(self, include_unlisted: bool = False) -> List[Listing]:
+        """Anúncios listados agora (ou todos os já vistos), dos vistos mais recentemente aos mais antigos."""
+        where = "" if include_unlisted else "WHERE listed = 1 "
+        cur = self.conn.execute(
+            "SELECT title, description, link, image_url, image_alt FROM listings "
+            f"{where}ORDER BY last_seen DESC, first_seen DESC, link"
+        )
+        return [Listing(*row) for row in cur]
+
+    def listings_by_page(self) -> List[Tuple[Optional[int], List[Listing]]]:
+        """Anúncios listados agora agrupados pela página em que foram vistos (sem página por último)."""
+        cur = self.conn.execute(
+            "SELECT page, title, description, link, image_url, image_alt FROM listings "
+            "WHERE listed = 1 ORDER BY page IS NULL, page, last_seen DESC, first_seen DESC, link"
+        )
+        groups: List[Tuple[Optional[int], List[Listing]]] = []
+        for page, *fields in cur:
+            if not groups or groups[-1][0] != page:
+                groups.append((page, []))
+            groups[-1][1].append(Listing(*fields))
+        return groups
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,67 @@
+"""
+Vigia de memória do Chrome para coletas longas.
+
+Soma o RSS do chromedriver e de toda a árvore de processos abaixo dele
+(navegador, renderers, GPU, utilitários) com psutil. Os scrapers consultam o
+vigia entre uma página e outra; passando do limite, o driver é recriado ali
+mesmo, antes que o Chrome cresça até o OOM killer derrubar a coleta.
+
+Com attach (Chrome de longa duração, ver browser_session) o navegador não é
+filho do chromedriver e a medida seria só a do chromedriver local: o scraper
+não cria o vigia nesse caso e --max-rss-mb com --attach é recusado.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import psutil
+
+DEFAULT_LIMIT_MB = 1500.0
+
+
+def browser_rss_mb(driver) -> Optional[float]:
+    """RSS total (MB) do chromedriver e dos processos filhos, ou None se não der para medir."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is None:
+        return None
+    try:
+        root = psutil.Process(process.pid)
+        procs = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+class MemoryWatchdog:
+    def __init__(self, limit_mb: float = DEFAULT_LIMIT_MB) -> None:
+        self.limit_mb = limit_mb
+        self.last_mb: Optional[float] = None
+        self.peak_mb = 0.0
+        self.recycles = 0
+
+    def sample(self, driver) -> Optional[float]:
+        """Mede o RSS atual (MB, arredondado) e guarda para should_recycle."""
+        self.last_mb = browser_rss_mb(driver)
+        if self.last_mb is None:
+            return None
+        self.peak_mb = max(self.peak_mb, self.last_mb)
+        return round(self.last_mb, 1)
+
+    def should_recycle(self) -> bool:
+        """True quando a última amostra passou do limite (e conta a reciclagem)."""
+        if self.last_mb is None or self.last_mb < self.limit_mb:
+            return False
+        print(f"[warn] Chrome usando {self.last_mb:.0f} MB (limite {self.limit_mb:.0f} MB); reciclando o driver.")
+        self.recycles += 1
+        return True
+
+    def print_summary(self) -> None:
+        if self.peak_mb:
+            print(f"[info] Memória do Chrome: pico de {self.peak_mb:.0f} MB, {self.recycles} reciclagens do driver.")
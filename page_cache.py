@@ -0,0 +1,182 @@
+"""
+Cache em disco de páginas HTML com requisições condicionais.
+
+Cada URL ocupa dois arquivos em cache_paginas/ (nome = SHA-256 da URL): o corpo
+bruto (.body) e os metadados (.json) com ETag, Last-Modified, charset e as
+análises já feitas sobre esse corpo. Na próxima busca vão If-None-Match e
+If-Modified-Since; com 304 o corpo em disco é reaproveitado e, se a mesma
+análise (backend + regras) já foi feita, nem o parse é refeito. Um corpo novo
+descarta as análises antigas.
+
+Modo offline: nada vai para a rede, só o que está em cache é usado (URL sem
+cache gera CacheMiss).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+
+CACHE_DIR = "cache_paginas"
+
+
+class CacheMiss(LookupError):
+    """URL pedida em modo offline sem cópia em cache."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _charset(headers: Mapping[str, str]) -> Optional[str]:
+    """charset do Content-Type (None se ausente: o parser detecta pelo <meta charset>)."""
+    for part in headers.get("Content-Type", "").split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip('"\' ')
+    return None
+
+
+@dataclass
+class CachedPage:
+    url: str
+    etag: str = ""
+    last_modified: str = ""
+    encoding: Optional[str] = None
+    size: int = 0
+    fetched_at: str = ""
+    validated_at: str = ""
+    analyses: Dict[str, Any] = field(default_factory=dict)
+
+
+class PageCache:
+    def __init__(self, root: str = CACHE_DIR) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # Usado também de threads (asyncio.to_thread no elementos_lote)
+        self._lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.root, key[:2], key)
+        return f"{base}.json", f"{base}.body"
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _save(self, page: CachedPage) -> None:
+        meta_path, _ = self._paths(page.url)
+        self._write(meta_path, json.dumps(asdict(page), ensure_ascii=False).encode("utf-8"))
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            self.stats.update(deltas)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        meta_path, body_path = self._paths(url)
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return CachedPage(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def body(self, page: CachedPage) -> bytes:
+        with open(self._paths(page.url)[1], "rb") as f:
+            return f.read()
+
+    def validators(self, page: Optional[CachedPage]) -> Dict[str, str]:
+        """Cabeçalhos da requisição condicional para a cópia em cache."""
+        headers: Dict[str, str] = {}
+        if page is not None:
+            if page.etag:
+                headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def store(self, url: str, body: bytes, headers: Mapping[str, str]) -> CachedPage:
+        """Grava um corpo novo (resposta 200); as análises do corpo anterior são descartadas."""
+        now = _now()
+        page = CachedPage(
+            url=url,
+            etag=headers.get("ETag", ""),
+            last_modified=headers.get("Last-Modified", ""),
+            encoding=_charset(headers),
+            size=len(body),
+            fetched_at=now,
+            validated_at=now,
+        )
+        self._write(self._paths(url)[1], body)
+        self._save(page)
+        self._count(downloaded=1, bytes_downloaded=len(body))
+        return page
+
+    def revalidated(self, page: CachedPage, headers: Mapping[str, str]) -> CachedPage:
+        """Resposta 304: a cópia continua valendo (o servidor pode mandar validadores novos)."""
+        page.etag = headers.get("ETag", page.etag)
+        page.last_modified = headers.get("Last-Modified", page.last_modified)
+        page.validated_at = _now()
+        self._save(page)
+        self._count(not_modified=1, bytes_reused=page.size)
+        return page
+
+    def used_offline(self, page: CachedPage) -> CachedPage:
+        self._count(offline=1, bytes_reused=page.size)
+        return page
+
+    def analysis(self, page: CachedPage, key: str) -> Optional[Dict[str, Dict[str, int]]]:
+        result = page.analyses.get(key)
+        if result is not None:
+            self._count(analyses_reused=1)
+        return result
+
+    def store_analysis(self, page: CachedPage, key: str, counts: Mapping[str, Mapping[str, int]]) -> None:
+        page.analyses[key] = {tag: dict(purposes) for tag, purposes in counts.items()}
+        self._save(page)
+
+    def print_summary(self) -> None:
+        s = self.stats
+        print(f"[info] Cache: {s['downloaded']} baixadas ({s['bytes_downloaded'] / 1024:.0f} KB), "
+              f"{s['not_modified']} não modificadas (304), {s['offline']} offline, "
+              f"{s['bytes_reused'] / 1024:.0f} KB reaproveitados, {s['analyses_reused']} análises reaproveitadas.")
+
+
+def fetch(
+    url: str,
+    cache: PageCache,
+    offline: bool = False,
+    session: Optional[requests.Session] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> Tuple[Optional[CachedPage], Optional[bytes]]:
+    """
+    (página em cache, corpo novo). Corpo None: a cópia em cache vale (304 ou
+    offline) e deve ser lida com cache.body(). Página None: resposta que não é
+    200, não vai para o cache mas o corpo é devolvido assim mesmo.
+    """
+    page = cache.get(url)
+    if offline:
+        if page is None:
+            raise CacheMiss(f"{url} não está no cache ({cache.root})")
+        return cache.used_offline(page), None
+    resp = (session or requests).get(url, headers={**(headers or {}), **cache.validators(page)}, timeout=timeout)
+    if resp.status_code == 304 and page is not None:
+        return cache.revalidated(page, resp.headers), None
+    if resp.status_code != 200:
+        return None, resp.content
+    return cache.store(url, resp.content, resp.headers), resp.content
@@ -0,0 +1,157 @@
+"""
+Resolvedor único de pop-ups (idade, cookies, consentimento) para os scrapers.
+
+Em vez de esperar cada seletor com um WebDriverWait próprio, todas as opções são
+verificadas em uma única chamada de script na página, que clica no primeiro
+elemento visível. O seletor que funcionou fica salvo por domínio em um arquivo
+JSON; nas próximas execuções ele é tentado primeiro e, assim que os pop-ups
+lembrados forem fechados, o tratamento termina.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+MEMORY_FILE = "popup_memory.json"
+
+# (chave, tipo, valor) em ordem de prioridade. "css" usa querySelectorAll;
+# "text" procura botões cujo texto (minúsculo) contenha o valor.
+CANDIDATES: List[Dict[str, str]] = [
+    {"key": "css:#accept-disclaimer", "kind": "css", "value": "#accept-disclaimer"},
+    {"key": "css:#onetrust-accept-btn-handler", "kind": "css", "value": "button#onetrust-accept-btn-handler"},
+    {"key": "css:button.b1", "kind": "css", "value": "button.b1"},
+    {"key": "text:aceitar todos os cookies", "kind": "text", "value": "aceitar todos os cookies"},
+    {"key": "text:accept all cookies", "kind": "text", "value": "accept all cookies"},
+    {"key": "text:aceitar", "kind": "text", "value": "aceitar"},
+    {"key": "text:concordo", "kind": "text", "value": "concordo"},
+    {"key": "text:i accept", "kind": "text", "value": "i accept"},
+    {"key": "text:i agree", "kind": "text", "value": "i agree"},
+    {"key": "text:accept", "kind": "text", "value": "accept"},
+    {"key": "text:allow", "kind": "text", "value": "allow"},
+]
+
+OVERLAY_SELECTORS = [
+    ".cookie-banner, .cookie-consent, .gdpr, .consent, .modal-backdrop.show",
+    ".ot-sdk-container",
+    ".fc-consent-root",
+]
+
+PROBE_SCRIPT = """
+const candidates = arguments[0];
+function visible(el){
+  if(!el || el.disabled) return false;
+  const st = window.getComputedStyle(el);
+  if(st.visibility === 'hidden' || st.display === 'none') return false;
+  return el.getClientRects().length > 0;
+}
+let buttons = null;
+for(const c of candidates){
+  let els;
+  if(c.kind === 'css'){
+    els = document.querySelectorAll(c.value);
+  } else {
+    buttons = buttons || Array.from(document.querySelectorAll('button, [role="button"]'));
+    els = buttons.filter(b => (b.textContent || '').toLowerCase().includes(c.value));
+  }
+  for(const el of els){
+    if(visible(el)){
+      el.click();
+      return c.key;
+    }
+  }
+}
+return null;
+"""
+
+HIDE_OVERLAYS_SCRIPT = """
+for(const sel of arguments[0]){
+  document.querySelectorAll(sel).forEach(e => { e.style.display = 'none'; });
+}
+"""
+
+
+def _load_memory(path: str) -> Dict[str, List[str]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_memory(path: str, memory: Dict[str, List[str]]) -> None:
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(memory, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def resolve_popups(
+    driver,
+    timeout: float = 5.0,
+    poll: float = 0.2,
+    memory_file: Optional[str] = MEMORY_FILE,
+    hide_overlays: bool = True,
+    grace: Optional[float] = None,
+) -> List[str]:
+    """
+    Fecha os pop-ups da página atual e retorna as chaves clicadas, em ordem.
+
+    Sem memória: sonda até `timeout` e termina logo após a página ficar sem
+    pop-ups visíveis depois do último clique. Com memória do domínio: termina
+    assim que todos os pop-ups lembrados tiverem sido clicados. grace: se nenhum
+    pop-up aparecer nos primeiros `grace` segundos, encerra (perfil persistente,
+    em que o aceite já está salvo nos cookies).
+    """
+    domain = urlparse(driver.current_url).netloc
+    memory = _load_memory(memory_file) if memory_file else {}
+    remembered = [k for k in memory.get(domain, []) if any(c["key"] == k for c in CANDIDATES)]
+    ordered = [c for k in remembered for c in CANDIDATES if c["key"] == k]
+    ordered += [c for c in CANDIDATES if c["key"] not in remembered]
+
+    clicked: List[str] = []
+    started = time.monotonic()
+    deadline = started + timeout
+    idle_after_click = 0
+    while time.monotonic() < deadline:
+        try:
+            key = driver.execute_script(PROBE_SCRIPT, ordered)
+        except WebDriverException:
+            key = None
+        if key:
+            clicked.append(key)
+            idle_after_click = 0
+            if clicked.count(key) >= 3:
+                # O elemento continua visível após o clique; não adianta insistir
+                break
+            if remembered and all(k in clicked for k in remembered):
+                break
+        elif clicked:
+            # Um pop-up pode abrir logo depois do outro; uma sonda extra basta
+            idle_after_click += 1
+            if idle_after_click >= 2:
+                break
+        elif grace is not None and time.monotonic() - started >= grace:
+            break
+        time.sleep(poll)
+
+    if hide_overlays:
+        try:
+            driver.execute_script(HIDE_OVERLAYS_SCRIPT, OVERLAY_SELECTORS)
+        except WebDriverException:
+            pass
+
+    worked = list(dict.fromkeys(clicked))
+    if memory_file and worked and worked != memory.get(domain):
+        memory[domain] = worked
+        _save_memory(memory_file, memory)
+    return clicked
@@ -12,10 +12,13 @@ This module scrapes Skokka pages with improved reliability:
 from __future__ import annotations
 
 import csv
+import json
+import threading
 import time
 import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 from selenium import webdriver
 from selenium.common.exceptions import (
@@ -25,11 +28,27 @@ from selenium.common.exceptions import (
     WebDriverException,
 )
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
+
+from browser_session import DEFAULT_DEBUGGER_ADDRESS, PROFILE_DIR, start_chrome
+from crawl_metrics import CommandCounter, MetricsWriter, PageRecord, page_source_bytes
+from debug_capture import DebugCapture
+from popup_resolver import resolve_popups
+from driver_profiles import (
+    apply_light_options,
+    apply_low_memory_options,
+    enable_performance_log,
+    enable_resource_blocking,
+    format_load_report,
+    page_load_report,
+    read_performance_log,
+)
+
+if TYPE_CHECKING:
+    from crawl_sink import StreamingSink
+    from listing_store import ListingStore
 
 
 @dataclass
@@ -50,12 +69,110 @@ class Listing:
         }
 
 
-def initialise_driver(headless: bool = True) -> webdriver.Chrome:
+ANCHOR_SELECTORS = [
+    "a.line-clamp.no-underline[data-pck][href*='/anuncio/']",
+    "a.line-clamp-3.no-underline[data-pck][href*='/anuncio/']",
+    "a[data-pck][href*='/anuncio/']",
+    "a[href*='/anuncio/'], a[href*='/ad/']",
+]
+
+# Script único executado na página: aplica as mesmas regras do caminho por âncora
+# (irmãos próximos para descrição/imagem, ancestral curto, fallbacks de lazy-load)
+# e devolve todos os anúncios como um array JSON em um só round trip.
+BATCH_EXTRACT_SCRIPT = """
+const selectors = arguments[0];
+function textOf(el){return (el && (el.innerText || el.textContent) || '').trim();}
+function imgOf(img){
+  const src = img.src || img.getAttribute('data-src') || img.getAttribute('data-lazy-src') || '';
+  return [src, img.getAttribute('alt') || ''];
+}
+function description(a, parent){
+  let n = a.nextSibling, steps = 0;
+  while(n && steps < 8){
+    if(n.nodeType === Node.ELEMENT_NODE){
+      if(n.tagName.toLowerCase() === 'span' && textOf(n)) return textOf(n);
+      const sp = n.querySelector && n.querySelector('span');
+      if(sp && textOf(sp)) return textOf(sp);
+      const p = n.querySelector && n.querySelector('p');
+      if(p && textOf(p)) return textOf(p);
+    }
+    n = n.nextSibling;
+    steps++;
+  }
+  if(parent){
+    for(const css of ['span', ".description, [class*='desc']", 'p']){
+      const t = textOf(parent.querySelector(css));
+      if(t) return t;
+    }
+  }
+  return '';
+}
+function siblingImage(a, prop){
+  let n = a[prop], steps = 0;
+  while(n && steps < 8){
+    if(n.nodeType === Node.ELEMENT_NODE){
+      const img = n.querySelector && (n.querySelector('img.v-lazy-image') || n.querySelector('img'));
+      if(img){
+        const r = imgOf(img);
+        if(r[0]) return r;
+      }
+    }
+    n = n[prop];
+    steps++;
+  }
+  return null;
+}
+function image(a, parent){
+  if(parent){
+    for(const css of ['img.v-lazy-image', "img[class*='lazy']", 'img']){
+      for(const img of parent.querySelectorAll(css)){
+        const r = imgOf(img);
+        if(r[0]) return r;
+      }
+    }
+  }
+  return siblingImage(a, 'previousSibling') || siblingImage(a, 'nextSibling') || ['', ''];
+}
+let anchors = [];
+for(const sel of selectors){
+  anchors = Array.from(document.querySelectorAll(sel));
+  if(anchors.length) break;
+}
+const items = anchors.map(a => {
+  const parent = a.parentElement && a.parentElement.closest('li, article, div');
+  let title = textOf(a);
+  if(!title) title = ((a.getAttribute('title') || '').trim() || (a.getAttribute('aria-label') || '').trim());
+  const img = image(a, parent);
+  return {title: title, link: a.href || '', description: description(a, parent), image_url: img[0], image_alt: img[1]};
+});
+return JSON.stringify(items);
+"""
+
+
+def initialise_driver(
+    headless: bool = True,
+    light: bool = False,
+    measure_load: bool = False,
+    profile_dir: Optional[str] = None,
+    attach: Optional[str] = None,
+    low_memory: bool = False,
+) -> webdriver.Chrome:
+    """
+    light: perfil leve (bloqueia imagens/fontes/CSS/mídia e hosts de analytics,
+    page_load_strategy="eager"). measure_load: liga o log de performance para
+    driver_profiles.page_load_report medir bytes e tempo por página.
+    profile_dir / attach: perfil persistente ou Chrome de longa duração (ver
+    browser_session); o chromedriver vem sempre do cache de browser_session.
+    low_memory: poucos renderers, janela e caches menores (ver driver_profiles).
+    """
     options = Options()
     # Performance/compat flags
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1366,768")
+    if low_memory:
+        apply_low_memory_options(options)
+    else:
+        options.add_argument("--window-size=1366,768")
     options.add_argument("--disable-infobars")
     options.add_argument("--disable-gpu")
     options.add_argument("--lang=pt-BR")
@@ -75,6 +192,10 @@ def initialise_driver(headless: bool = True) -> webdriver.Chrome:
     # Reduzir logs do Chromium no console (não silencia logs do site)
     options.add_argument("--log-level=3")
     options.add_argument("--disable-logging")
+    if light:
+        apply_light_options(options)
+    if light or measure_load:
+        enable_performance_log(options)
 
     # Reduz verbosidade do Chromium e direciona logs do chromedriver
     try:
@@ -82,13 +203,13 @@ def initialise_driver(headless: bool = True) -> webdriver.Chrome:
         os.makedirs("debug", exist_ok=True)
     except Exception:
         pass
-    service = Service(ChromeDriverManager().install())
-    try:
-        service.log_path = "debug/chromedriver.log"
-    except Exception:
-        pass
-    driver = webdriver.Chrome(service=service, options=options)
+    driver = start_chrome(options, profile_dir=profile_dir, attach=attach, log_path="debug/chromedriver.log")
+    prepare_tab(driver, light=light)
+    return driver
 
+
+def prepare_tab(driver: webdriver.Chrome, light: bool = False) -> None:
+    """Ajustes via DevTools que valem por aba; repetidos em cada aba nova."""
     # Remover navigator.webdriver via DevTools
     try:
         driver.execute_cdp_cmd(
@@ -104,85 +225,200 @@ Object.defineProperty(navigator, 'platform', {get: () => 'Win32'});
     except Exception:
         pass
 
-    return driver
+    if light:
+        enable_resource_blocking(driver)
 
 
-def accept_prompts(driver: webdriver.Chrome, wait: WebDriverWait) -> None:
-    # Tenta diversos elementos de consentimento/cookie/idade em possíveis idiomas/variantes
-    selectors = [
-        (By.ID, "accept-disclaimer"),
-        (By.CSS_SELECTOR, "button#onetrust-accept-btn-handler"),
-        (By.XPATH, "//button[contains(translate(., 'ACEITAR', 'aceitar'), 'aceitar')]"),
-        (By.XPATH, "//button[contains(translate(., 'CONCORDO', 'concordo'), 'concordo')]"),
-        (By.XPATH, "//button[contains(translate(., 'ACCEPT', 'accept'), 'accept')]"),
-        (By.XPATH, "//button[contains(translate(., 'ALLOW', 'allow'), 'allow')]"),
-        (By.XPATH, "//button[contains(., 'Aceitar todos os cookies')]"),
-        (By.XPATH, "//button[contains(., 'Aceitar')]"),
-        (By.XPATH, "//button[contains(., 'I accept')]"),
-        (By.XPATH, "//button[contains(., 'I Agree')]"),
-    ]
-    # Aplica um deadline global curto para evitar ruído
-    end_time = time.time() + 10.0
-    for by, value in selectors:
-        if time.time() > end_time:
-            break
-        try:
-            btn = wait.until(EC.element_to_be_clickable((by, value)))
-            btn.click()
-            # aguarda overlay sumir rapidamente
-            time.sleep(0.2)
-        except (TimeoutException, WebDriverException):
-            continue
+def accept_prompts(driver: webdriver.Chrome, wait: WebDriverWait, grace: Optional[float] = None) -> None:
+    """
+    Fecha consentimento/cookie/idade com popup_resolver: todos os seletores são
+    testados em uma só chamada de script e o que funcionou fica lembrado por domínio.
+    grace: com perfil persistente os pop-ups costumam não aparecer; desiste após
+    esse tempo sem nenhum.
+    """
+    clicked = resolve_popups(driver, timeout=10.0, grace=grace)
+    if clicked:
+        print(f"  – pop-ups fechados: {', '.join(clicked)}")
 
-    # Fecha overlays comuns (se existirem)
-    overlay_selectors = [
-        ".cookie-banner, .cookie-consent, .gdpr, .consent, .modal-backdrop.show",
-        ".ot-sdk-container",
-        ".fc-consent-root",
-    ]
-    for sel in overlay_selectors:
-        try:
-            elems = driver.find_elements(By.CSS_SELECTOR, sel)
-            for e in elems:
-                driver.execute_script("arguments[0].style.display='none';", e)
-        except WebDriverException:
-            pass
 
+SETTLE_QUIET_SECONDS = 0.5
+SETTLE_CEILING_SECONDS = 8.0
+
+# Rola até o fim e observa mutações do DOM: a cada mudança na contagem de âncoras
+# ou na altura da página rola de novo; conclui quando nada muda por quietMs
+# (ou ao atingir o teto ceilingMs).
+LAZY_LOAD_SETTLE_SCRIPT = """
+const selector = arguments[0], quietMs = arguments[1], ceilingMs = arguments[2];
+const done = arguments[arguments.length - 1];
+const start = performance.now();
+let lastCount = -1, lastHeight = -1, scrolls = 0, quietTimer = null, finished = false;
+function snapshot(){ return [document.querySelectorAll(selector).length, document.body.scrollHeight]; }
+const observer = new MutationObserver(check);
+const ceilingTimer = setTimeout(() => finish(true), ceilingMs);
+function finish(timedOut){
+  if(finished) return;
+  finished = true;
+  observer.disconnect();
+  clearTimeout(quietTimer);
+  clearTimeout(ceilingTimer);
+  done({settle_ms: Math.round(performance.now() - start), anchors: snapshot()[0], scrolls: scrolls, timed_out: timedOut});
+}
+function check(){
+  const [count, height] = snapshot();
+  if(count !== lastCount || height !== lastHeight){
+    lastCount = count;
+    lastHeight = height;
+    window.scrollTo(0, document.body.scrollHeight);
+    scrolls++;
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(() => finish(false), quietMs);
+  }
+}
+observer.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['src', 'class', 'style']});
+check();
+"""
+
+
+def scroll_to_load(driver: webdriver.Chrome, max_steps: int = 8, pause: float = 0.8) -> None:
+    """Rolagem com pausas fixas (fallback quando o script assíncrono não roda)."""
+    last_height = driver.execute_script("return document.body.scrollHeight")
+    stable_steps = 0
+    for _ in range(max_steps):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(pause)
+        new_height = driver.execute_script("return document.body.scrollHeight")
+        if new_height == last_height:
+            stable_steps += 1
+            if stable_steps >= 2:
+                break
+        else:
+            stable_steps = 0
+        last_height = new_height
+
+
+def wait_for_lazy_load(
+    driver: webdriver.Chrome,
+    quiet: float = SETTLE_QUIET_SECONDS,
+    ceiling: float = SETTLE_CEILING_SECONDS,
+) -> Dict:
+    """
+    Espera o lazy-load terminar: retorna assim que a contagem de âncoras (e a
+    altura da página) fica estável por `quiet` segundos, no máximo `ceiling`.
+    Retorna {"settle_seconds", "anchors", "scrolls", "timed_out", "fallback"}.
+    """
+    start = time.perf_counter()
+    info = None
+    try:
+        driver.set_script_timeout(ceiling + 5)
+        info = driver.execute_async_script(
+            LAZY_LOAD_SETTLE_SCRIPT, ", ".join(ANCHOR_SELECTORS), int(quiet * 1000), int(ceiling * 1000)
+        )
+    except WebDriverException as e:
+        print(f"[warn] Espera por mutações falhou, usando rolagem fixa: {e.__class__.__name__}")
+    if not isinstance(info, dict):
+        scroll_to_load(driver)
+        info = {"anchors": None, "scrolls": None, "timed_out": False, "fallback": True}
+    else:
+        info["fallback"] = False
+    info.pop("settle_ms", None)
+    info["settle_seconds"] = round(time.perf_counter() - start, 3)
+    return info
+
+
+def _listings_from_batch(
+    driver: webdriver.Chrome, wait: WebDriverWait, stats: Optional[Dict] = None
+) -> Optional[List[Listing]]:
+    """
+    Caminho rápido: um único execute_script coleta título, link, descrição e imagem
+    de todas as âncoras. Retorna None se o script falhar (usa-se o caminho por âncora).
+    """
+    try:
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join(ANCHOR_SELECTORS))))
+    except TimeoutException:
+        print("[warn] Nenhum anúncio encontrado nesta página (âncoras não localizadas).")
+        return []
+
+    try:
+        raw = driver.execute_script(BATCH_EXTRACT_SCRIPT, ANCHOR_SELECTORS)
+        items = json.loads(raw)
+    except (WebDriverException, TypeError, ValueError) as e:
+        print(f"[warn] Extração em lote falhou, usando extração por âncora: {e.__class__.__name__}")
+        return None
+    if not isinstance(items, list):
+        return None
+
+    print(f"  – {len(items)} âncoras de anúncios detectadas.")
+    if stats is not None:
+        stats["anchors"] = len(items)
+        stats["extraction_path"] = "batch"
+    results: List[Listing] = []
+    for item in items:
+        title = (item.get("title") or "").strip()
+        link = item.get("link") or ""
+        desc = (item.get("description") or "").strip()
+        if desc and title and desc == title:
+            desc = ""
+        if title or link:
+            results.append(Listing(
+                title=title,
+                description=desc,
+                link=link,
+                image_url=item.get("image_url") or "",
+                image_alt=item.get("image_alt") or "",
+            ))
+    return results
 
-def extract_listings(driver: webdriver.Chrome, wait: WebDriverWait) -> List[Listing]:
+
+def extract_listings(
+    driver: webdriver.Chrome,
+    wait: WebDriverWait,
+    mode: str = "batch",
+    settle_quiet: float = SETTLE_QUIET_SECONDS,
+    settle_ceiling: float = SETTLE_CEILING_SECONDS,
+    stats: Optional[Dict] = None,
+) -> List[Listing]:
     """
     Extrai anúncios especificamente no formato do Skokka:
     - âncora do anúncio: <a class="line-clamp ... no-underline" data-pck ... href*="/anuncio/">
     - descrição curta: <span> adjacente/irmão próximo com o resumo
     - imagem: <img class="v-lazy-image ..."> próxima ao anúncio, capturando src e alt
     Mantém fallbacks para pequenas variações.
+
+    mode="batch" extrai tudo com um único script na página; mode="per_anchor" (ou
+    falha do lote) usa as chamadas individuais de WebDriver para cada âncora.
+    mode="xhr" monta os anúncios a partir das respostas JSON da página (requer o
+    log de performance do driver, ver skokka_xhr) e cai para "batch" sem elas.
+    Se stats for um dict, recebe o resultado de wait_for_lazy_load (settle_seconds etc.),
+    o número de âncoras e o caminho de extração usado; no modo xhr também as
+    entradas do log de performance lidas ("performance_log"), para page_load_report.
     """
-    def scroll_to_load(max_steps: int = 8, pause: float = 0.8) -> None:
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        stable_steps = 0
-        for _ in range(max_steps):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(pause)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                stable_steps += 1
-                if stable_steps >= 2:
-                    break
-            else:
-                stable_steps = 0
-            last_height = new_height
+    settle = wait_for_lazy_load(driver, quiet=settle_quiet, ceiling=settle_ceiling)
+    if stats is not None:
+        stats.update(settle)
 
-    anchor_selectors = [
-        "a.line-clamp.no-underline[data-pck][href*='/anuncio/']",
-        "a.line-clamp-3.no-underline[data-pck][href*='/anuncio/']",
-        "a[data-pck][href*='/anuncio/']",
-        "a[href*='/anuncio/'], a[href*='/ad/']",
-    ]
+    if mode == "xhr":
+        from skokka_xhr import listings_from_network
 
-    scroll_to_load()
+        entries = read_performance_log(driver)
+        if stats is not None:
+            stats["performance_log"] = entries
+        from_json = listings_from_network(driver, base_url=driver.current_url, entries=entries)
+        if from_json:
+            print(f"  – {len(from_json)} anúncios lidos das respostas JSON da página.")
+            if stats is not None:
+                stats["anchors"] = len(from_json)
+                stats["extraction_path"] = "xhr"
+            return from_json
+        print("[info] Nenhuma resposta JSON com anúncios; extraindo do DOM.")
+        mode = "batch"
+
+    if mode == "batch":
+        batch = _listings_from_batch(driver, wait, stats)
+        if batch is not None:
+            return batch
 
     anchors = []
-    for sel in anchor_selectors:
+    for sel in ANCHOR_SELECTORS:
         try:
             wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, sel)))
             anchors = driver.find_elements(By.CSS_SELECTOR, sel)
@@ -196,6 +432,9 @@ def extract_listings(driver: webdriver.Chrome, wait: WebDriverWait) -> List[List
         return []
 
     print(f"  – {len(anchors)} âncoras de anúncios detectadas.")
+    if stats is not None:
+        stats["anchors"] = len(anchors)
+        stats["extraction_path"] = "per_anchor"
 
     def get_adjacent_description(a_el) -> str:
         try:
@@ -362,15 +601,8 @@ def go_to_next_page(driver: webdriver.Chrome, wait: WebDriverWait) -> bool:
 
     # 2) Fallback: tentar construir próxima URL se houver ?page= N
     try:
-        from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-
         url = driver.current_url
-        pr = urlparse(url)
-        qs = parse_qs(pr.query)
-        page = int(qs.get("page", ["1"])[0])
-        qs["page"] = [str(page + 1)]
-        new_query = urlencode(qs, doseq=True)
-        new_url = urlunparse((pr.scheme, pr.netloc, pr.path, pr.params, new_query, pr.fragment))
+        new_url = next_page_url(url)
         if new_url != url:
             driver.get(new_url)
             WebDriverWait(driver, 20).until(lambda d: d.current_url != url)
@@ -381,8 +613,110 @@ def go_to_next_page(driver: webdriver.Chrome, wait: WebDriverWait) -> bool:
     return False
 
 
+NEXT_PAGE_HREF_SCRIPT = """
+const a = document.querySelector(".pagination__next, a[rel='next']");
+return a && a.href ? a.href : '';
+"""
+
+
+def open_prefetch_tab(driver: webdriver.Chrome, light: bool = False) -> Optional[str]:
+    """
+    Abre a próxima página (href de .pagination__next ou o fallback ?page=N) numa
+    segunda aba e volta para a aba atual sem esperar o carregamento. Retorna o
+    handle da nova aba, ou None se não foi possível abri-la.
+    """
+    current = driver.current_window_handle
+    try:
+        url = driver.execute_script(NEXT_PAGE_HREF_SCRIPT) or next_page_url(driver.current_url)
+        driver.switch_to.new_window("tab")
+        handle = driver.current_window_handle
+        # Script anti-detecção e bloqueio de recursos precisam valer antes da navegação
+        prepare_tab(driver, light=light)
+        # Navegação disparada depois do retorno do script: o chromedriver não espera por ela
+        driver.execute_script("const u = arguments[0]; setTimeout(() => { location.href = u; }, 0);", url)
+        driver.switch_to.window(current)
+        return handle
+    except WebDriverException as e:
+        print(f"[warn] Não foi possível pré-carregar a próxima página: {e.__class__.__name__}")
+        try:
+            driver.switch_to.window(current)
+        except WebDriverException:
+            pass
+        return None
+
+
+def switch_to_prefetched(driver: webdriver.Chrome, handle: str, timeout: float = 20) -> None:
+    """
+    Fecha a aba atual e passa para a aba pré-carregada, esperando o documento
+    (readyState interactive/complete). Se a aba não ficar pronta a tempo, levanta
+    TimeoutException: a página seguinte existe, só está lenta, e quem chamou deve
+    carregá-la de novo pela URL em vez de encerrar a paginação.
+    """
+    current_url = driver.current_url
+    driver.close()
+    driver.switch_to.window(handle)
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.current_url not in ("about:blank", current_url)
+        and d.execute_script("return document.readyState") != "loading"
+    )
+
+
+def close_tab(driver: webdriver.Chrome, handle: str) -> None:
+    """Fecha uma aba pré-carregada que não será usada, voltando para a aba atual."""
+    try:
+        current = driver.current_window_handle
+        driver.switch_to.window(handle)
+        driver.close()
+        driver.switch_to.window(current)
+    except WebDriverException:
+        pass
+
+
+def next_page_url(url: str) -> str:
+    """Constrói a URL da próxima página incrementando (ou criando) ?page=N."""
+    from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+    pr = urlparse(url)
+    qs = parse_qs(pr.query)
+    page = int(qs.get("page", ["1"])[0])
+    qs["page"] = [str(page + 1)]
+    new_query = urlencode(qs, doseq=True)
+    return urlunparse((pr.scheme, pr.netloc, pr.path, pr.params, new_query, pr.fragment))
+
+
+def page_url(start_url: str, page: int) -> str:
+    """URL da página N da listagem (?page=N; a página 1 é a própria start_url)."""
+    if page <= 1:
+        return start_url
+    from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+    pr = urlparse(start_url)
+    qs = parse_qs(pr.query)
+    qs["page"] = [str(page)]
+    return urlunparse((pr.scheme, pr.netloc, pr.path, pr.params, urlencode(qs, doseq=True), pr.fragment))
+
+
+def next_page_url_from_html(source: str, current_url: str) -> str:
+    """Usa o href de .pagination__next/a[rel=next] do HTML; senão, o fallback ?page=N."""
+    from lxml import html
+    from urllib.parse import urljoin
+
+    try:
+        doc = html.fromstring(source)
+        hrefs = doc.xpath("//*[contains(concat(' ', normalize-space(@class), ' '), ' pagination__next ')]/@href"
+                          " | //a[@rel='next']/@href")
+        if hrefs and hrefs[0].strip():
+            return urljoin(current_url, hrefs[0].strip())
+    except Exception:
+        pass
+    return next_page_url(current_url)
+
+
+LISTING_FIELDS = ["title", "description", "link", "image_url", "image_alt"]
+
+
 def write_to_csv(rows: List[Listing], filename: str = "skokka_listings.csv") -> None:
-    headers = ["title", "description", "link", "image_url", "image_alt"]
+    headers = LISTING_FIELDS
     if not rows:
         print("[info] Nenhum anúncio para salvar.")
         with open(filename, "w", newline="", encoding="utf-8") as f:
@@ -399,78 +733,697 @@ def write_to_csv(rows: List[Listing], filename: str = "skokka_listings.csv") ->
     print(f"[info] {len(rows)} anúncios salvos em '{filename}'.")
 
 
-def scrape_skokka(start_url: str, max_pages: Optional[int] = None, headless: bool = False) -> List[Listing]:
+@dataclass
+class RetryItem:
+    page: int
+    url: str
+    attempts: int
+    due: float
+
+
+class RetryQueue:
+    """
+    Páginas que falharam, aguardando nova tentativa com espera exponencial
+    (base_delay, 2×, 4×… até max_delay). Após max_attempts tentativas no total a
+    página é descartada e fica em `skipped`.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 5.0, max_delay: float = 120.0) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempts: Dict[int, int] = {}
+        self.pending: Dict[int, RetryItem] = {}
+        self.recovered: List[int] = []
+        self.skipped: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def failed(self, page: int, url: str) -> Optional[float]:
+        """Registra a falha; retorna a espera até a próxima tentativa (None = descartada)."""
+        attempts = self.attempts.get(page, 0) + 1
+        self.attempts[page] = attempts
+        if attempts >= self.max_attempts:
+            self.skipped.append(page)
+            return None
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        self.pending[page] = RetryItem(page, url, attempts, time.monotonic() + delay)
+        return delay
+
+    def succeeded(self, page: int) -> None:
+        if self.attempts.get(page):
+            self.recovered.append(page)
+
+    def pop_next(self) -> RetryItem:
+        """Retira a tentativa mais próxima de vencer, esperando até o seu horário."""
+        item = min(self.pending.values(), key=lambda i: i.due)
+        del self.pending[item.page]
+        delay = item.due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return item
+
+    def pop_due(self) -> Optional[RetryItem]:
+        """Retira a tentativa vencida mais antiga sem esperar (None se nenhuma venceu)."""
+        now = time.monotonic()
+        due = [i for i in self.pending.values() if i.due <= now]
+        if not due:
+            return None
+        item = min(due, key=lambda i: i.due)
+        del self.pending[item.page]
+        return item
+
+    def seconds_until_due(self) -> float:
+        """Espera até a próxima tentativa vencer (0 se já há uma vencida)."""
+        return max(0.0, min(i.due for i in self.pending.values()) - time.monotonic())
+
+    def state(self) -> List[Dict]:
+        """Tentativas pendentes no formato gravado no checkpoint."""
+        return [{"page": i.page, "url": i.url, "attempts": i.attempts} for i in self.pending.values()]
+
+    def restore(self, state: List[Dict]) -> None:
+        for entry in state:
+            page = int(entry["page"])
+            self.attempts[page] = int(entry.get("attempts", 1))
+            self.pending[page] = RetryItem(page, entry["url"], self.attempts[page], time.monotonic())
+
+    def print_summary(self) -> None:
+        if self.recovered:
+            print(f"[info] Páginas recuperadas em nova tentativa: {', '.join(map(str, sorted(self.recovered)))}")
+        if self.skipped:
+            print(f"[warn] Páginas ignoradas após {self.max_attempts} tentativas: "
+                  f"{', '.join(map(str, sorted(self.skipped)))}")
+        if self.pending:
+            print(f"[warn] Páginas ainda pendentes de nova tentativa: "
+                  f"{', '.join(map(str, sorted(self.pending)))}")
+
+
+def scrape_skokka(
+    start_url: str,
+    max_pages: Optional[int] = None,
+    headless: bool = False,
+    extraction_mode: str = "batch",
+    store: Optional["ListingStore"] = None,
+    sink: Optional["StreamingSink"] = None,
+    resume: Optional[Dict] = None,
+    settle_ceiling: float = SETTLE_CEILING_SECONDS,
+    light_profile: bool = False,
+    measure_load: bool = False,
+    debug: Optional[DebugCapture] = None,
+    metrics: Optional[MetricsWriter] = None,
+    prefetch: bool = False,
+    profile_dir: Optional[str] = None,
+    attach: Optional[str] = None,
+    max_attempts: int = 4,
+    retry_delay: float = 5.0,
+    recreate_after: int = 3,
+    max_consecutive_failures: int = 5,
+    low_memory: bool = False,
+    max_rss_mb: Optional[float] = None,
+) -> List[Listing]:
     """
     Durante a fase de diagnóstico, headless=False para visualizar o fluxo.
+    extraction_mode: "batch" (um script por página), "per_anchor" ou "xhr"
+    (respostas JSON da página, com fallback para o DOM).
+    store: se informado, cada página é gravada no SQLite e a paginação para quando
+    uma página inteira só tem anúncios já conhecidos e inalterados. Se a coleta
+    chega ao fim da paginação sem páginas descartadas (e sem resume), marca o
+    store como completo (ListingStore.mark_complete).
+    sink: se informado, cada página é anexada ao arquivo (com checkpoint) assim que
+    extraída e os anúncios não ficam acumulados em memória (retorno vazio).
+    resume: checkpoint de um sink; a coleta continua a partir da página seguinte.
+    settle_ceiling: teto (s) da espera adaptativa do lazy-load; o tempo real de cada
+    página vai para as métricas (fase "scroll") para calibrar os timeouts.
+    light_profile: bloqueia recursos pesados (ver driver_profiles); com ele ou com
+    measure_load, cada página informa bytes transferidos e tempo de carregamento.
+    debug: política de captura de HTML/screenshot (ver debug_capture); por padrão
+    captura sempre, gravando em segundo plano e mantendo só as últimas capturas.
+    metrics: destino das métricas por página (JSON Lines, ver crawl_metrics); por
+    padrão debug/crawl_metrics.jsonl.
+    prefetch: abre a próxima página numa segunda aba antes de extrair a atual, de
+    modo que o carregamento dela se sobreponha à extração (não combina com "xhr",
+    que lê o log de rede da aba atual).
+    profile_dir / attach: perfil persistente do Chrome ou endereço de um Chrome de
+    longa duração (ver browser_session); o aceite de pop-ups fica salvo e a espera
+    por eles desiste cedo.
+    Páginas com erro não interrompem a coleta: vão para uma fila de novas
+    tentativas (RetryQueue; espera exponencial a partir de retry_delay, até
+    max_attempts tentativas) processada depois da paginação, e a paginação segue
+    pela URL ?page=N. Após recreate_after falhas seguidas do WebDriver o driver é
+    recriado; max_consecutive_failures páginas seguidas com erro encerram a
+    paginação. As tentativas pendentes vão para o checkpoint do sink.
+    low_memory: perfil de memória reduzida do Chrome. max_rss_mb: liga o vigia de
+    memória (memory_watchdog); passando do limite, o driver é reciclado entre uma
+    página e a seguinte. Com attach o Chrome não é filho do chromedriver e não dá
+    para medi-lo, então o vigia não é criado.
     """
-    driver = initialise_driver(headless=headless)
+    if prefetch and extraction_mode == "xhr":
+        print("[warn] Pré-carregamento desativado no modo xhr.")
+        prefetch = False
+    popup_grace = 2.0 if (profile_dir or attach) else None
+    retries = RetryQueue(max_attempts=max_attempts, base_delay=retry_delay)
+    watchdog = None
+    if max_rss_mb and attach:
+        print("[warn] Vigia de memória desativado com attach (o Chrome não é filho do chromedriver).")
+    elif max_rss_mb:
+        from memory_watchdog import MemoryWatchdog
+
+        watchdog = MemoryWatchdog(limit_mb=max_rss_mb)
     all_listings: List[Listing] = []
+    own_debug = debug is None
+    if debug is None:
+        debug = DebugCapture()
+    own_metrics = metrics is None
+    if metrics is None:
+        metrics = MetricsWriter()
 
-    def save_debug(prefix: str) -> None:
-        import os
-        os.makedirs("debug", exist_ok=True)
-        try:
-            with open(f"debug/{prefix}.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-        except Exception:
-            pass
-        try:
-            driver.save_screenshot(f"debug/{prefix}.png")
-        except Exception:
-            pass
+    driver: Optional[webdriver.Chrome] = None
+    commands: Optional[CommandCounter] = None
+    wait: Optional[WebDriverWait] = None
+    prompts_done = False
 
-    try:
-        driver.get(start_url)
+    def start_driver(reason: str = "") -> None:
+        nonlocal driver, commands, wait, prompts_done
+        if driver is not None:
+            if reason:
+                print(f"[warn] Recriando o driver {reason}.")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        # O modo xhr lê as respostas de rede pelo mesmo log de performance
+        driver = initialise_driver(
+            headless=headless,
+            light=light_profile,
+            measure_load=measure_load or extraction_mode == "xhr",
+            profile_dir=profile_dir,
+            attach=attach,
+            low_memory=low_memory,
+        )
+        commands = CommandCounter(driver)
         wait = WebDriverWait(driver, 25)
+        prompts_done = False
+
+    def save_debug(prefix: str, error: bool = False) -> None:
+        debug.capture(driver, prefix, page=page, error=error)
+
+    def load(url: str, record: PageRecord) -> None:
+        """driver.get da página; na primeira página do driver também fecha os pop-ups."""
+        nonlocal prompts_done
+        with record.phase("navigation"):
+            driver.get(url)
+            # Aguarda carregamento completo do documento
+            try:
+                WebDriverWait(driver, 25).until(lambda d: d.execute_script("return document.readyState") == "complete")
+            except TimeoutException:
+                pass
+        if prompts_done:
+            return
+        with record.phase("debug"):
+            save_debug(f"page_{page}_loaded")
+        with record.phase("popups"):
+            accept_prompts(driver, wait, grace=popup_grace)
+            # Pequena espera apenas para transições de overlay
+            time.sleep(0.5)
+        with record.phase("debug"):
+            save_debug(f"page_{page}_after_accept")
+        prompts_done = True
+
+    checkpoint: Optional[Dict] = None
 
-        # Passo 1: aguarda carregamento completo do documento
+    def process_page(record: PageRecord, frontier: bool):
+        """Extrai a página carregada, grava a saída e as métricas; retorna o diff do store."""
+        nonlocal checkpoint
+        settle: Dict = {}
+        extract_start = time.perf_counter()
+        listings = extract_listings(
+            driver, wait, mode=extraction_mode, settle_ceiling=settle_ceiling, stats=settle
+        )
+        extract_seconds = time.perf_counter() - extract_start
+        record.add_time("scroll", settle.get("settle_seconds", 0.0))
+        record.add_time("extraction", extract_seconds - settle.get("settle_seconds", 0.0))
+        print(f"  – {commands.count} comandos WebDriver na página.")
+        print(f"  – lazy-load estável em {settle.get('settle_seconds', 0):.2f}s"
+              f"{' (teto atingido)' if settle.get('timed_out') else ''}.")
+        if light_profile or measure_load:
+            # No modo xhr o log já foi lido pela extração
+            load_report = page_load_report(driver, entries=settle.get("performance_log"))
+            record.set(network=load_report)
+            print(f"  – rede: {format_load_report(load_report)}.")
+        with record.phase("debug"):
+            if not listings:
+                # Salva debug adicional quando 0 anúncios
+                save_debug(f"page_{page}_zero_listings", error=True)
+            else:
+                save_debug(f"page_{page}_ok")
+
+        with record.phase("output"):
+            if sink is not None:
+                if frontier:
+                    checkpoint = {"page": page, "url": driver.current_url}
+                if checkpoint is not None:
+                    # Páginas recuperadas fora de ordem não movem o checkpoint
+                    sink.write_page(checkpoint["page"], checkpoint["url"], listings, retry=retries.state())
+                else:
+                    sink.write_rows(listings)
+            else:
+                all_listings.extend(listings)
+
+            diff = store.record_page(listings, page) if store is not None else None
+
+        record.set(
+            anchors=settle.get("anchors"),
+            listings=len(listings),
+            extraction_path=settle.get("extraction_path"),
+            settle={k: settle.get(k) for k in ("timed_out", "scrolls", "fallback")},
+            webdriver_commands=commands.count,
+            page_source_bytes=page_source_bytes(driver),
+        )
+        if watchdog is not None:
+            record.set(browser_rss_mb=watchdog.sample(driver))
+        metrics.write(record)
+        return diff
+
+    driver_failures = 0
+
+    def page_failed(record: PageRecord, url: str, e: Exception) -> None:
+        """Registra a falha, agenda nova tentativa e recria o driver se o WebDriver insiste em falhar."""
+        nonlocal driver_failures
+        print(f"[error] Falha ao processar página {page}: {e.__class__.__name__}: {e}")
+        record.set(error=f"{e.__class__.__name__}: {e}", webdriver_commands=commands.count)
+        metrics.write(record)
         try:
-            WebDriverWait(driver, 25).until(lambda d: d.execute_script("return document.readyState") == "complete")
-        except TimeoutException:
+            save_debug(f"page_{page}_error", error=True)
+        except Exception:
             pass
-        save_debug("page_1_loaded")
+        delay = retries.failed(page, url)
+        if delay is None:
+            print(f"[warn] Página {page} descartada após {retries.max_attempts} tentativas.")
+        else:
+            print(f"[info] Página {page} volta para a fila; nova tentativa em {delay:.0f}s.")
+        driver_failures = driver_failures + 1 if isinstance(e, WebDriverException) else 0
+        if driver_failures >= recreate_after:
+            start_driver("após falhas seguidas do WebDriver")
+            driver_failures = 0
 
-        accept_prompts(driver, wait)
-        # Pequena espera apenas para transições de overlay
-        time.sleep(0.5)
-        save_debug("page_1_after_accept")
+    def new_record(number: int, url: str = "") -> PageRecord:
+        """Registro da página seguinte; o contador de comandos recomeça junto com ele."""
+        commands.reset()
+        return metrics.page(number, url)
 
-        page = 1
-        while True:
-            try:
-                print(f"[info] Extraindo página {page}…")
-                listings = extract_listings(driver, wait)
-                if not listings:
-                    # Salva debug adicional quando 0 anúncios
-                    save_debug(f"page_{page}_zero_listings")
-                else:
-                    save_debug(f"page_{page}_ok")
+    page = 1
+    url = start_url
+    if resume:
+        page = int(resume["page"])
+        url = resume["url"]
+        checkpoint = {"page": page, "url": url}
+        retries.restore(resume.get("retry") or [])
+        print(f"[info] Retomando a coleta na página {page + 1} (checkpoint).")
 
-                all_listings.extend(listings)
+    start_driver()
+    record = new_record(page)
+    reached_end = False
+    try:
+        loaded = False
+        frontier_open = True
+        if resume:
+            load(url, record)
+            with record.phase("navigation"):
+                frontier_open = go_to_next_page(driver, wait)
+            if not frontier_open:
+                print("[info] Não há página seguinte ao checkpoint; nada a retomar.")
+            page += 1
+            url = driver.current_url
+            loaded = True
+            record = new_record(page)
 
+        consecutive_failures = 0
+        while frontier_open:
+            prefetched: Optional[str] = None
+            try:
+                if not loaded:
+                    load(url, record)
+                    loaded = True
+                url = driver.current_url
+                print(f"[info] Extraindo página {page}…")
+                record.set(url=url)
+                if prefetch and not (max_pages and page >= max_pages):
+                    with record.phase("prefetch"):
+                        prefetched = open_prefetch_tab(driver, light=light_profile)
+                diff = process_page(record, frontier=True)
+                retries.succeeded(page)
+                consecutive_failures = driver_failures = 0
+            except Exception as e:
+                page_failed(record, url, e)
+                consecutive_failures += 1
+                if prefetched is not None:
+                    close_tab(driver, prefetched)
+                if consecutive_failures >= max_consecutive_failures:
+                    print(f"[warn] {consecutive_failures} páginas seguidas falharam; encerrando a paginação.")
+                    break
                 if max_pages and page >= max_pages:
                     break
-                if not go_to_next_page(driver, wait):
+                # A página com erro não serve para achar o link seguinte; vai direto por ?page=N
+                page += 1
+                url = next_page_url(url)
+                loaded = False
+                record = new_record(page)
+                continue
+
+            if diff is not None:
+                print(f"  – {diff.new} novos, {diff.changed} alterados, {diff.unchanged} inalterados.")
+                if diff.all_unchanged:
+                    print("[info] Página sem novidades; encerrando a coleta incremental.")
                     break
 
+            if max_pages and page >= max_pages:
+                break
+            if watchdog is not None and watchdog.should_recycle():
+                # Fronteira de página: a próxima abre direto pela URL no driver novo
+                next_url = driver.execute_script(NEXT_PAGE_HREF_SCRIPT) or next_page_url(url)
+                start_driver("para liberar memória")
                 page += 1
-                # pequena pausa para evitar sobrecarga
+                url = next_url
+                loaded = False
+                record = new_record(page)
+                continue
+            record = new_record(page + 1)
+            try:
+                with record.phase("navigation"):
+                    if prefetched is not None:
+                        switch_to_prefetched(driver, prefetched)
+                        has_next = True
+                    else:
+                        has_next = go_to_next_page(driver, wait)
+            except WebDriverException as e:
+                print(f"[warn] Falha ao navegar para a página {page + 1}: {e.__class__.__name__}; usando ?page=N.")
+                has_next, loaded = True, False
+                try:
+                    # A troca de aba pode ter fechado a aba atual antes de falhar
+                    driver.switch_to.window(driver.window_handles[-1])
+                except WebDriverException:
+                    pass
+            if not has_next:
+                reached_end = True
+                break
+
+            url = next_page_url(url) if not loaded else driver.current_url
+            page += 1
+            # pequena pausa para evitar sobrecarga
+            with record.phase("throttle"):
                 time.sleep(0.8)
+
+        while retries.pending:
+            item = retries.pop_next()
+            page = item.page
+            record = new_record(page, item.url)
+            record.set(attempt=item.attempts + 1)
+            try:
+                print(f"[info] Nova tentativa da página {page} ({item.attempts + 1}/{retries.max_attempts})…")
+                load(item.url, record)
+                process_page(record, frontier=False)
+                retries.succeeded(page)
+                driver_failures = 0
             except Exception as e:
-                print(f"[error] Falha ao processar página {page}: {e.__class__.__name__}: {e}")
-                save_debug(f"page_{page}_error")
-                break
+                page_failed(record, item.url, e)
 
+        # Na retomada as páginas anteriores ao checkpoint foram vistas em outra execução
+        if store is not None and reached_end and not retries.skipped and not resume:
+            store.mark_complete()
     finally:
         try:
             driver.quit()
         except Exception:
             pass
+        if own_debug:
+            debug.close()
+        else:
+            debug.flush()
+        if own_metrics:
+            metrics.close()
+        retries.print_summary()
+        if watchdog is not None:
+            watchdog.print_summary()
+
+    return all_listings
+
+
+class RateLimiter:
+    """Limite global de requisições por segundo, compartilhado entre as threads."""
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self) -> None:
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def scrape_skokka_parallel(
+    start_url: str,
+    workers: int = 4,
+    max_pages: Optional[int] = None,
+    headless: bool = True,
+    requests_per_second: float = 1.0,
+    light_profile: bool = False,
+    max_attempts: int = 4,
+    retry_delay: float = 5.0,
+    store: Optional["ListingStore"] = None,
+) -> List[Listing]:
+    """
+    Rastreia as páginas ?page=N em paralelo com um pool fixo de threads, cada uma
+    com o seu próprio Chrome. Para de distribuir páginas assim que uma volta vazia
+    e junta os resultados em ordem de página (descartando o que vier depois da
+    primeira página vazia). requests_per_second limita a carga total no site.
+    Uma página que falha (timeout, queda do driver) não conta como vazia: volta
+    para a fila com espera exponencial (RetryQueue) e a thread ganha um Chrome novo.
+    store: recebe os anúncios ao final; é marcado como completo se a coleta
+    parou numa página vazia sem descartar nenhuma página antes dela.
+    """
+    limiter = RateLimiter(requests_per_second)
+    retries = RetryQueue(max_attempts=max_attempts, base_delay=retry_delay)
+    local = threading.local()
+    drivers: List[webdriver.Chrome] = []
+    drivers_lock = threading.Lock()
+
+    def get_driver() -> webdriver.Chrome:
+        driver = getattr(local, "driver", None)
+        if driver is None:
+            driver = initialise_driver(headless=headless, light=light_profile)
+            with drivers_lock:
+                drivers.append(driver)
+            local.driver = driver
+            local.prompts_done = False
+        return driver
+
+    def drop_driver() -> None:
+        driver = getattr(local, "driver", None)
+        local.driver = None
+        if driver is None:
+            return
+        with drivers_lock:
+            drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def crawl_page(page: int) -> List[Listing]:
+        driver = get_driver()
+        wait = WebDriverWait(driver, 25)
+        limiter.wait()
+        try:
+            driver.get(page_url(start_url, page))
+            if not local.prompts_done:
+                accept_prompts(driver, wait)
+                local.prompts_done = True
+            return extract_listings(driver, wait)
+        except WebDriverException:
+            # A próxima página desta thread começa com um driver novo
+            drop_driver()
+            raise
+
+    results: Dict[int, List[Listing]] = {}
+    first_empty: Optional[int] = None
+    next_page = 1
+    pending: Dict[Future, int] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="skokka") as pool:
+            def submit_more() -> None:
+                nonlocal next_page
+                while len(pending) < workers:
+                    # Novas tentativas vencidas têm prioridade sobre páginas novas
+                    item = retries.pop_due()
+                    if item is not None:
+                        pending[pool.submit(crawl_page, item.page)] = item.page
+                        continue
+                    if first_empty is not None or (max_pages and next_page > max_pages):
+                        return
+                    pending[pool.submit(crawl_page, next_page)] = next_page
+                    next_page += 1
+
+            submit_more()
+            while pending or retries.pending:
+                if not pending:
+                    # Só restam novas tentativas: espera a mais próxima vencer
+                    time.sleep(retries.seconds_until_due())
+                    submit_more()
+                    continue
+                timeout = retries.seconds_until_due() if retries.pending else None
+                done, _ = wait_futures(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    page = pending.pop(fut)
+                    try:
+                        listings = fut.result()
+                    except Exception as e:
+                        print(f"[error] Falha ao processar página {page}: {e.__class__.__name__}: {e}")
+                        delay = retries.failed(page, page_url(start_url, page))
+                        if delay is None:
+                            print(f"[warn] Página {page} descartada após {retries.max_attempts} tentativas.")
+                        else:
+                            print(f"[info] Página {page} volta para a fila; nova tentativa em {delay:.0f}s.")
+                        continue
+                    retries.succeeded(page)
+                    print(f"[info] Página {page}: {len(listings)} anúncios.")
+                    results[page] = listings
+                    if not listings and (first_empty is None or page < first_empty):
+                        first_empty = page
+                        # Páginas depois da primeira vazia não entram no resultado
+                        for p in [p for p in retries.pending if p >= first_empty]:
+                            del retries.pending[p]
+                submit_more()
+    finally:
+        retries.print_summary()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    all_listings: List[Listing] = []
+    for page in sorted(results):
+        if first_empty is not None and page >= first_empty:
+            break
+        all_listings.extend(results[page])
+        if store is not None:
+            store.record_page(results[page], page)
+    if store is not None:
+        if first_empty is not None and not any(p < first_empty for p in retries.skipped):
+            store.mark_complete()
+    return all_listings
+
+
+def scrape_skokka_http(
+    start_url: str,
+    max_pages: Optional[int] = None,
+    headless: bool = True,
+    light_profile: bool = False,
+    store: Optional["ListingStore"] = None,
+) -> List[Listing]:
+    """
+    Variante HTTP-first: cada página é pedida via requests.Session (keep-alive) e
+    analisada direto com o parser offline. O Chrome só é iniciado quando o HTML
+    simples não traz as âncoras de anúncio. Ao final imprime quantas páginas
+    vieram por HTTP e quantas precisaram do navegador.
+    store: recebe cada página; é marcado como completo se a coleta chegou a uma
+    página vazia (ou repetida) sem erro.
+    """
+    from http_fetch import PageFetcher
+    from skokka_offline import parse_html
+
+    def make_driver() -> webdriver.Chrome:
+        driver = initialise_driver(headless=headless, light=light_profile)
+        driver.get(start_url)
+        accept_prompts(driver, WebDriverWait(driver, 25))
+        return driver
+
+    fetcher = PageFetcher(content_selector=", ".join(ANCHOR_SELECTORS), driver_factory=make_driver)
+    all_listings: List[Listing] = []
+    seen_urls = set()
+    url = start_url
+    page = 1
+    truncated = False
+    try:
+        while url not in seen_urls:
+            seen_urls.add(url)
+            print(f"[info] Extraindo página {page}…")
+            result = fetcher.fetch(url)
+            listings = parse_html(result.html, base_url=url)
+            print(f"  – {len(listings)} anúncios.")
+            if not listings:
+                break
+            all_listings.extend(listings)
+            if store is not None:
+                store.record_page(listings, page)
+            if max_pages and page >= max_pages:
+                truncated = True
+                break
+            url = next_page_url_from_html(result.html, url)
+            page += 1
+            time.sleep(0.8)
+        if store is not None and not truncated:
+            store.mark_complete()
+    except Exception as e:
+        print(f"[error] Falha ao processar página {page}: {e.__class__.__name__}: {e}")
+    finally:
+        fetcher.print_summary()
+        fetcher.close()
 
     return all_listings
 
 
 def main() -> None:
+    import argparse
+
+    from crawl_sink import StreamingSink, load_checkpoint
+    from listing_store import ListingStore
+
+    parser = argparse.ArgumentParser(description="Coleta anúncios do Skokka.")
+    parser.add_argument("--output", default="skokka_listings.csv",
+                        help="arquivo de saída (.csv, .jsonl, .csv.gz, .jsonl.gz ou .parquet)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continua a partir do checkpoint da última coleta interrompida")
+    parser.add_argument("--light", action="store_true",
+                        help="perfil leve: bloqueia imagens/fontes/CSS/mídia e analytics")
+    parser.add_argument("--mode", choices=["batch", "per_anchor", "xhr"], default="batch",
+                        help="estratégia de extração dos anúncios")
+    parser.add_argument("--prefetch", action="store_true",
+                        help="carrega a próxima página numa segunda aba durante a extração")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, default=None,
+                        help="usa um perfil persistente do Chrome (cookies/aceites entre execuções)")
+    parser.add_argument("--attach", nargs="?", const=DEFAULT_DEBUGGER_ADDRESS, default=None,
+                        help="conecta a um Chrome aberto com `python browser_session.py serve`")
+    parser.add_argument("--max-attempts", type=int, default=4,
+                        help="tentativas por página antes de descartá-la")
+    parser.add_argument("--fetch", choices=["browser", "http"], default="browser",
+                        help="http: pede cada página via requests e só abre o Chrome se faltar conteúdo")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="páginas ?page=N em paralelo, um Chrome por thread (sem checkpoint)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Chrome headless enxuto para VMs pequenas, com vigia de memória")
+    parser.add_argument("--max-rss-mb", type=float, default=None,
+                        help="recicla o driver quando o Chrome passa deste RSS (padrão com --low-memory: 1500)")
+    parser.add_argument("--debug-capture", choices=["always", "error", "every_n"], default="always",
+                        help="quando salvar HTML/screenshot de depuração")
+    parser.add_argument("--debug-every", type=int, default=10,
+                        help="intervalo de páginas no modo every_n")
+    parser.add_argument("--debug-keep", type=int, default=200,
+                        help="quantas capturas manter em debug/ (as mais antigas são apagadas)")
+    args = parser.parse_args()
+    if args.workers > 1 and args.resume:
+        parser.error("--workers não grava checkpoint; não combina com --resume")
+    if args.fetch == "http" and (args.workers > 1 or args.resume):
+        parser.error("--fetch http não combina com --workers nem com --resume")
+    if args.attach and args.max_rss_mb:
+        parser.error("--max-rss-mb não combina com --attach (o Chrome anexado não pode ser medido)")
+
     # Configura logging básico do nosso script
     logging.basicConfig(
         level=logging.INFO,
@@ -482,17 +1435,82 @@ def main() -> None:
     logging.getLogger("webdriver_manager").setLevel(logging.WARNING)
 
     start_url = "https://br.skokka.com/encontros/sao-paulo/"
-    # Durante diagnóstico: headless=False e max_pages=1 para acelerar
-    listings: List[Listing] = []
+    checkpoint = load_checkpoint(args.output) if args.resume else None
+    if args.resume and checkpoint is None:
+        print("[warn] Nenhum checkpoint encontrado; iniciando do começo.")
+
+    store = ListingStore("skokka_listings.db")
+    debug = DebugCapture(mode=args.debug_capture, every_n=args.debug_every, keep_last=args.debug_keep)
+    sink = StreamingSink(
+        args.output,
+        LISTING_FIELDS,
+        append=checkpoint is not None,
+        metadata={"scraper": "scrape_skokka", "start_url": start_url, "mode": args.mode},
+    )
+    completed = False
+    store.begin_run()
     try:
-        # Removido o limite de páginas para coletar todas as páginas até não existir "próxima".
+        # Coleta incremental: para na primeira página que não traz nada novo/alterado.
+        # Cada página vai para o arquivo na hora; uma queda pode ser retomada com --resume.
         # Para testes rápidos, você pode limitar: scrape_skokka(start_url, max_pages=2, headless=False)
-        listings = scrape_skokka(start_url=start_url, headless=False)
+        if args.fetch == "http":
+            listings = scrape_skokka_http(start_url, headless=args.low_memory, light_profile=args.light, store=store)
+            sink.write_rows(listings)
+        elif args.workers > 1:
+            # Em paralelo as páginas chegam fora de ordem: grava tudo ao final
+            listings = scrape_skokka_parallel(
+                start_url,
+                workers=args.workers,
+                headless=args.low_memory,
+                light_profile=args.light,
+                max_attempts=args.max_attempts,
+                store=store,
+            )
+            sink.write_rows(listings)
+        else:
+            scrape_skokka(
+                start_url=start_url,
+                headless=args.low_memory,
+                store=store,
+                sink=sink,
+                resume=checkpoint,
+                light_profile=args.light,
+                extraction_mode=args.mode,
+                debug=debug,
+                prefetch=args.prefetch,
+                profile_dir=args.profile,
+                attach=args.attach,
+                max_attempts=args.max_attempts,
+                low_memory=args.low_memory,
+                max_rss_mb=args.max_rss_mb or (1500.0 if args.low_memory and not args.attach else None),
+            )
+        completed = True
     except Exception as e:
         print(f"[error] Falha geral na coleta: {e.__class__.__name__}: {e}")
     finally:
-        write_to_csv(listings)
-        print(f"[info] Coleta concluída: {len(listings)} anúncios (arquivo: skokka_listings.csv)")
+        collected = sink.rows_written
+        sink.close()
+        if completed:
+            # Ao concluir, o arquivo (qualquer formato) passa a refletir o que está anunciado
+            # agora: o que foi visto nesta execução mais as páginas não visitadas numa
+            # parada incremental. A regravação vai página a página (no Parquet, um row
+            # group por página) e mantém horários e páginas da coleta; --workers e
+            # --fetch http gravam tudo de uma vez, então as páginas vêm do store
+            removed = store.finish_run()
+            by_page = store.listings_by_page()
+            final = StreamingSink(args.output, LISTING_FIELDS, metadata=sink.metadata,
+                                  started_at=sink.started_at, finished_at=sink.finished_at,
+                                  pages=sink.pages_written or len(store.run_pages))
+            for _, listings in by_page:
+                final.write_rows(listings)
+            final.finish()
+            print(f"[info] Coleta concluída: {collected} anúncios nesta execução, "
+                  f"{final.rows_written} anunciados agora, {removed} saíram do ar (arquivo: {args.output})")
+        else:
+            print(f"[info] Coleta interrompida: {collected} anúncios salvos em '{args.output}'. "
+                  f"Use --resume para continuar.")
+        store.close()
+        debug.close()
 
 
 if __name__ == "__main__":
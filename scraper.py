@@ -1,3 +1,4 @@
+"""
 ATUALIZACAO DO CODIGO
 Web scraper para Skokka - MODO DE DEPURAÇÃO v2
 
@@ -6,17 +7,16 @@ seja carregado antes de salvar o HTML para análise.
 """
 from __future__ import annotations
 
-import time
 import logging
 
 from selenium import webdriver
-from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
+
+from browser_session import start_chrome
+from driver_profiles import apply_light_options, enable_performance_log, enable_resource_blocking
+from http_fetch import PageFetcher
+from popup_resolver import resolve_popups
 
 # --- FUNÇÃO DE DEPURAÇÃO ---
 def save_debug_html(driver: webdriver.Chrome, filename: str = "debug.html"):
@@ -28,9 +28,18 @@ def save_debug_html(driver: webdriver.Chrome, filename: str = "debug.html"):
     except Exception as e:
         logging.error(f"Falha ao salvar o HTML de depuração: {e}")
 
+def save_html(source: str, filename: str = "debug.html"):
+    """Salva um HTML já obtido (ex.: resposta HTTP) em arquivo."""
+    try:
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(source)
+        logging.info(f"✅ HTML de depuração salvo com sucesso em '{filename}'.")
+    except Exception as e:
+        logging.error(f"Falha ao salvar o HTML de depuração: {e}")
+
 # --- FUNÇÕES DO SCRAPER ---
-def initialise_driver(headless: bool = True) -> webdriver.Chrome:
-    """Configura e inicializa o driver do Chrome."""
+def initialise_driver(headless: bool = True, light: bool = False) -> webdriver.Chrome:
+    """Configura e inicializa o driver do Chrome (light: perfil leve de driver_profiles)."""
     options = Options()
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
@@ -45,61 +54,63 @@ def initialise_driver(headless: bool = True) -> webdriver.Chrome:
     )
     if headless:
         options.add_argument("--headless=new")
+    if light:
+        apply_light_options(options)
+        enable_performance_log(options)
     
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=options)
+    driver = start_chrome(options)
+    if light:
+        enable_resource_blocking(driver)
+    return driver
 
 def handle_initial_popups(driver: webdriver.Chrome, wait: WebDriverWait) -> None:
-    """Lida com pop-ups de idade e cookies de forma segura."""
-    selectors = [
-        (By.CSS_SELECTOR, "button.b1"),
-        (By.XPATH, "//button[contains(., 'Aceitar Todos Os Cookies')]"),
-    ]
-    for by, selector in selectors:
-        try:
-            button = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((by, selector)))
-            button.click()
-            logging.info(f"Pop-up aceito com o seletor: {selector}")
-            time.sleep(1.5)
-        except TimeoutException:
-            logging.warning(f"Pop-up não encontrado com o seletor: {selector}")
+    """Lida com pop-ups de idade e cookies com uma sonda única por chamada (popup_resolver)."""
+    clicked = resolve_popups(driver, timeout=10.0)
+    if clicked:
+        logging.info(f"Pop-ups aceitos: {', '.join(clicked)}")
+    else:
+        logging.warning("Nenhum pop-up encontrado.")
 
 # --- FUNÇÃO PRINCIPAL ---
 def main():
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
     
     start_url = "https://br.skokka.com/encontros/sao-paulo/"
-    
-    driver = initialise_driver(headless=False)
-    wait = WebDriverWait(driver, 20)
+    ad_selector = "a[href*='/anuncio/']"
+
+    def make_driver() -> webdriver.Chrome:
+        driver = initialise_driver(headless=False)
+        driver.get(start_url)
+        logging.info("Aguardando pop-ups...")
+        handle_initial_popups(driver, WebDriverWait(driver, 20))
+        return driver
+
+    # Tenta primeiro o HTML servido direto; o Chrome só sobe se os anúncios não vierem nele
+    fetcher = PageFetcher(content_selector=ad_selector, driver_factory=make_driver)
     
     try:
         logging.info("--- INICIANDO MODO DE DEPURAÇÃO v2 ---")
-        driver.get(start_url)
-        
-        logging.info("Aguardando pop-ups...")
-        handle_initial_popups(driver, wait)
-        
-        # Passo crucial: esperar que os anúncios sejam carregados
-        ad_selector = "a[href*='/anuncio/']"
-        logging.info(f"Aguardando os anúncios aparecerem na página (seletor: {ad_selector})...")
-        try:
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ad_selector)))
+        logging.info(f"Buscando a página (seletor dos anúncios: {ad_selector})...")
+        result = fetcher.fetch(start_url)
+        if result.path == "browser" and fetcher.html_has_content(result.html):
             logging.info("✅ Anúncios encontrados na página.")
-        except TimeoutException:
+        elif result.path == "browser":
             logging.error("TIMEOUT: Os anúncios não carregaram a tempo.")
+        else:
+            logging.info("✅ Anúncios presentes no HTML do servidor (sem navegador).")
 
-        # Salvar o HTML depois de esperar
         logging.info("Salvando o estado da página após o carregamento dos anúncios...")
-        save_debug_html(driver)
+        save_html(result.html)
         
         logging.info("O script de depuração terminou. Por favor, verifique o novo 'debug.html'.")
 
     except Exception as e:
         logging.critical(f"Um erro crítico ocorreu: {e}", exc_info=True)
-        save_debug_html(driver)
+        if fetcher.active_driver is not None:
+            save_debug_html(fetcher.active_driver)
     finally:
-        driver.quit()
+        fetcher.print_summary()
+        fetcher.close()
         logging.info("🏁 Depuração concluída.")
 
 if __name__ == "__main__":
@@ -0,0 +1,253 @@
+"""
+Parser offline para as páginas salvas pelo scraper do Skokka.
+
+Lê os arquivos debug/page_N_ok.html(.gz) gravados por scrape_skokka.scrape_skokka e
+reconstrói os objetos Listing sem abrir o Chrome, usando lxml:
+- mesmos seletores de âncora (ANCHOR_SELECTORS)
+- mesmas regras de irmãos próximos para descrição e imagem (até 8 nós)
+- mesmo ancestral curto (li/article/div) e fallbacks v-lazy-image/data-src
+Um diretório inteiro é processado em paralelo com um pool de processos.
+
+Uso:
+    python skokka_offline.py debug --out skokka_listings_offline.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import gzip
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cssselect import HTMLTranslator
+from lxml import etree, html
+
+from scrape_skokka import ANCHOR_SELECTORS, Listing, write_to_csv
+
+DEFAULT_BASE_URL = "https://br.skokka.com/"
+DESC_SELECTORS = ["span", ".description, [class*='desc']", "p"]
+IMAGE_SELECTORS = ["img.v-lazy-image", "img[class*='lazy']", "img"]
+SIBLING_STEPS = 8
+
+
+@lru_cache(maxsize=None)
+def _compiled(css: str, descendants_only: bool) -> etree.XPath:
+    # querySelector nunca casa o próprio elemento, por isso o prefixo descendant::
+    prefix = "descendant::" if descendants_only else "descendant-or-self::"
+    return etree.XPath(HTMLTranslator().css_to_xpath(css, prefix=prefix))
+
+
+def _query_all(el, css: str, descendants_only: bool = True) -> list:
+    return _compiled(css, descendants_only)(el)
+
+
+def _query(el, css: str):
+    found = _query_all(el, css)
+    return found[0] if found else None
+
+
+def _text_content(el) -> str:
+    return (el.text_content() if el is not None else "").strip()
+
+
+def _inner_text(el) -> str:
+    # Aproxima o innerText do navegador: espaços colapsados
+    return " ".join(el.text_content().split()) if el is not None else ""
+
+
+def _dom_siblings(a, forward: bool) -> Iterator[Optional[etree._Element]]:
+    """
+    Percorre os irmãos como nextSibling/previousSibling do DOM: nós de texto
+    (tail/text do lxml) também contam como passo e são emitidos como None.
+    """
+    if forward:
+        if a.tail:
+            yield None
+        n = a.getnext()
+        while n is not None:
+            yield n
+            if n.tail:
+                yield None
+            n = n.getnext()
+    else:
+        n = a.getprevious()
+        while n is not None:
+            if n.tail:
+                yield None
+            yield n
+            n = n.getprevious()
+        parent = a.getparent()
+        if parent is not None and parent.text:
+            yield None
+
+
+def _is_element(n) -> bool:
+    return n is not None and isinstance(n.tag, str)
+
+
+def _image_of(img) -> Tuple[str, str]:
+    src = img.get("src") or img.get("data-src") or img.get("data-lazy-src") or ""
+    return src, img.get("alt") or ""
+
+
+def _short_ancestor(a):
+    found = a.xpath("./ancestor::*[self::li or self::article or self::div][1]")
+    return found[0] if found else None
+
+
+def _description(a, parent) -> str:
+    for steps, n in enumerate(_dom_siblings(a, forward=True)):
+        if steps >= SIBLING_STEPS:
+            break
+        if not _is_element(n):
+            continue
+        if n.tag.lower() == "span" and _text_content(n):
+            return _text_content(n)
+        for css in ("span", "p"):
+            text = _text_content(_query(n, css))
+            if text:
+                return text
+
+    if parent is not None:
+        for css in DESC_SELECTORS:
+            text = _inner_text(_query(parent, css))
+            if text:
+                return text
+    return ""
+
+
+def _sibling_image(a, forward: bool) -> Optional[Tuple[str, str]]:
+    for steps, n in enumerate(_dom_siblings(a, forward=forward)):
+        if steps >= SIBLING_STEPS:
+            break
+        if not _is_element(n):
+            continue
+        img = _query(n, "img.v-lazy-image") or _query(n, "img")
+        if img is not None:
+            src, alt = _image_of(img)
+            if src:
+                return src, alt
+    return None
+
+
+def _related_image(a, parent) -> Tuple[str, str]:
+    if parent is not None:
+        for css in IMAGE_SELECTORS:
+            for img in _query_all(parent, css):
+                src, alt = _image_of(img)
+                if src:
+                    return src, alt
+    return _sibling_image(a, forward=False) or _sibling_image(a, forward=True) or ("", "")
+
+
+def parse_html(source: str, base_url: str = DEFAULT_BASE_URL) -> List[Listing]:
+    """Extrai os anúncios de um HTML já renderizado (page_source salvo)."""
+    if not source.strip():
+        return []
+    doc = html.fromstring(source)
+    # Equivale a a.href / img.src no navegador (URLs absolutas)
+    doc.make_links_absolute(base_url, resolve_base_href=True)
+
+    anchors = []
+    for sel in ANCHOR_SELECTORS:
+        anchors = _query_all(doc, sel, descendants_only=False)
+        if anchors:
+            break
+
+    results: List[Listing] = []
+    for a in anchors:
+        title = _inner_text(a)
+        if not title:
+            title = (a.get("title") or "").strip() or (a.get("aria-label") or "").strip()
+        link = a.get("href") or ""
+        parent = _short_ancestor(a)
+        desc = _description(a, parent)
+        img_src, img_alt = _related_image(a, parent)
+
+        if desc and title and desc.strip() == title.strip():
+            desc = ""
+
+        if title or link:
+            results.append(Listing(
+                title=title,
+                description=desc,
+                link=link,
+                image_url=img_src,
+                image_alt=img_alt,
+            ))
+    return results
+
+
+def parse_file(path: str, base_url: str = DEFAULT_BASE_URL) -> List[Listing]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        return parse_html(f.read(), base_url=base_url)
+
+
+def _page_number(path: str) -> int:
+    m = re.search(r"page_(\d+)", os.path.basename(path))
+    return int(m.group(1)) if m else 0
+
+
+def _parse_file_task(args: Tuple[str, str]) -> List[Listing]:
+    path, base_url = args
+    return parse_file(path, base_url=base_url)
+
+
+def _unique_by_stem(paths: List[str]) -> List[str]:
+    """
+    Um arquivo por página: page_N_ok.html e page_N_ok.html.gz (captura com gzip)
+    são a mesma página; fica o modificado por último, que é a captura mais recente.
+    """
+    chosen: Dict[str, str] = {}
+    for path in paths:
+        stem = path[:-3] if path.endswith(".gz") else path
+        current = chosen.get(stem)
+        if current is None or os.path.getmtime(path) > os.path.getmtime(current):
+            chosen[stem] = path
+    return list(chosen.values())
+
+
+def parse_directory(
+    directory: str = "debug",
+    pattern: str = "page_*_ok.html*",
+    base_url: str = DEFAULT_BASE_URL,
+    workers: Optional[int] = None,
+) -> List[Tuple[str, List[Listing]]]:
+    """
+    Processa todas as páginas salvas do diretório em um pool de processos.
+    Retorna [(arquivo, anúncios)] em ordem de página.
+    """
+    paths = sorted(_unique_by_stem(glob.glob(os.path.join(directory, pattern))),
+                   key=lambda p: (_page_number(p), p))
+    if not paths:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+        parsed = pool.map(_parse_file_task, [(p, base_url) for p in paths], chunksize=chunksize)
+        return list(zip(paths, parsed))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reextrai anúncios do Skokka a partir do HTML salvo.")
+    parser.add_argument("directory", nargs="?", default="debug")
+    parser.add_argument("--pattern", default="page_*_ok.html*")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="skokka_listings_offline.csv")
+    args = parser.parse_args()
+
+    pages = parse_directory(args.directory, args.pattern, args.base_url, args.workers)
+    rows: List[Listing] = []
+    for path, listings in pages:
+        print(f"[info] {os.path.basename(path)}: {len(listings)} anúncios")
+        rows.extend(listings)
+    write_to_csv(rows, filename=args.out)
+
+
+if __name__ == "__main__":
+    main()
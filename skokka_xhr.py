@@ -0,0 +1,157 @@
+"""
+Extração dos anúncios a partir das respostas JSON (XHR/fetch) da própria página.
+
+Com o log de performance do Chrome ligado (driver_profiles.enable_performance_log),
+as respostas de rede ficam registradas; as que têm corpo JSON são lidas via
+DevTools (Network.getResponseBody) e vasculhadas atrás de uma lista de objetos
+com cara de anúncio (link /anuncio/ + título). Cada objeto vira um Listing.
+
+Se nenhuma resposta assim for encontrada, quem chamou deve cair para o DOM.
+Observação: ler o log de performance o consome; quem também precisa dele na
+mesma página (page_load_report) deve ler uma vez só (read_performance_log) e
+passar as entradas para as duas funções.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from selenium.common.exceptions import WebDriverException
+
+from driver_profiles import read_performance_log
+from scrape_skokka import Listing
+
+TITLE_KEYS = ("title", "titulo", "name", "headline", "nome")
+DESCRIPTION_KEYS = ("description", "descricao", "short_description", "summary", "excerpt", "text", "body")
+LINK_KEYS = ("url", "link", "href", "permalink", "absolute_url", "canonical_url", "path")
+IMAGE_KEYS = ("image_url", "image", "thumbnail", "thumb", "photo", "picture", "cover", "main_image")
+IMAGE_LIST_KEYS = ("images", "photos", "pictures", "media", "gallery")
+ALT_KEYS = ("image_alt", "alt", "alt_text")
+AD_PATH_MARKERS = ("/anuncio/", "/ad/")
+
+
+def json_responses(driver, entries: Optional[List[Dict[str, Any]]] = None) -> List[Tuple[str, Any]]:
+    """(url, objeto) de cada resposta JSON registrada desde a última leitura do log (ou em entries)."""
+    if entries is None:
+        entries = read_performance_log(driver)
+
+    candidates: Dict[str, str] = {}
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method") != "Network.responseReceived":
+            continue
+        params = message.get("params", {})
+        response = params.get("response", {})
+        mime = (response.get("mimeType") or "").lower()
+        if "json" in mime and params.get("requestId"):
+            candidates[params["requestId"]] = response.get("url", "")
+
+    results: List[Tuple[str, Any]] = []
+    for request_id, url in candidates.items():
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            results.append((url, json.loads(body.get("body") or "")))
+        except (WebDriverException, ValueError):
+            continue
+    return results
+
+
+def _first_str(obj: Dict[str, Any], keys: Tuple[str, ...]) -> str:
+    for key in keys:
+        val = obj.get(key)
+        if isinstance(val, str) and val.strip():
+            return val.strip()
+        if isinstance(val, dict):
+            for sub in ("url", "src", "href", "original", "large", "medium"):
+                if isinstance(val.get(sub), str) and val[sub].strip():
+                    return val[sub].strip()
+    return ""
+
+
+def _image_of(obj: Dict[str, Any]) -> str:
+    image = _first_str(obj, IMAGE_KEYS)
+    if image:
+        return image
+    for key in IMAGE_LIST_KEYS:
+        items = obj.get(key)
+        if isinstance(items, list) and items:
+            first = items[0]
+            if isinstance(first, str):
+                return first
+            if isinstance(first, dict):
+                return _first_str(first, ("url", "src", "original", "large", "medium", "thumbnail"))
+    return ""
+
+
+def _image_alt_of(obj: Dict[str, Any]) -> str:
+    """Texto alternativo informado pelo JSON (no anúncio ou no objeto da imagem); senão vazio."""
+    alt = _first_str(obj, ALT_KEYS)
+    if alt:
+        return alt
+    for key in IMAGE_KEYS + IMAGE_LIST_KEYS:
+        image = obj.get(key)
+        if isinstance(image, list) and image:
+            image = image[0]
+        if isinstance(image, dict):
+            for sub in ALT_KEYS:
+                if isinstance(image.get(sub), str) and image[sub].strip():
+                    return image[sub].strip()
+    return ""
+
+
+def listing_from_object(obj: Dict[str, Any], base_url: str) -> Optional[Listing]:
+    """Converte um objeto JSON em Listing, se ele tiver cara de anúncio."""
+    link = _first_str(obj, LINK_KEYS)
+    if not link or not any(m in link for m in AD_PATH_MARKERS):
+        return None
+    title = _first_str(obj, TITLE_KEYS)
+    description = _first_str(obj, DESCRIPTION_KEYS)
+    if description == title:
+        description = ""
+    return Listing(
+        title=title,
+        description=description,
+        link=urljoin(base_url, link),
+        image_url=_image_of(obj),
+        image_alt=_image_alt_of(obj),
+    )
+
+
+def _object_lists(node: Any, depth: int = 0) -> Iterator[List[Dict[str, Any]]]:
+    if depth > 8:
+        return
+    if isinstance(node, list):
+        if node and all(isinstance(x, dict) for x in node):
+            yield node
+        for item in node:
+            yield from _object_lists(item, depth + 1)
+    elif isinstance(node, dict):
+        for value in node.values():
+            yield from _object_lists(value, depth + 1)
+
+
+def listings_from_json(payload: Any, base_url: str) -> List[Listing]:
+    """A maior lista de objetos do JSON em que a maioria dos itens é anúncio."""
+    best: List[Listing] = []
+    for objects in _object_lists(payload):
+        converted = [listing_from_object(o, base_url) for o in objects]
+        listings = [x for x in converted if x is not None]
+        if len(listings) * 2 >= len(objects) and len(listings) > len(best):
+            best = listings
+    return best
+
+
+def listings_from_network(
+    driver, base_url: str, entries: Optional[List[Dict[str, Any]]] = None
+) -> List[Listing]:
+    """Anúncios de todas as respostas JSON da página (sem duplicar links)."""
+    by_link: Dict[str, Listing] = {}
+    for _, payload in json_responses(driver, entries):
+        for listing in listings_from_json(payload, base_url):
+            by_link.setdefault(listing.link, listing)
+    return list(by_link.values())
@@ -0,0 +1,28 @@
+"""Os três backends de ELEMENTOS_PAGINA devem produzir o mesmo relatório."""
+
+import pytest
+
+from ELEMENTOS_PAGINA import BACKENDS, analisar_html
+
+pytest.importorskip("lxml")
+
+TEMPLATE_ANINHADO = (
+    b"<html><body><div>x<template>topo<div><ul><li>copyright 2024</li></ul>login</div>fim"
+    b"<template><a href='/entrar'>entrar</a></template></template>menu</div>"
+    b"<footer>copyright</footer></body></html>"
+)
+
+
+def _contagens(html, backend):
+    return {tag: dict(propositos) for tag, propositos in analisar_html(html, None, backend).items()}
+
+
+@pytest.mark.parametrize("backend", [b for b in BACKENDS if b != "html.parser"])
+def test_template_aninhado_igual_em_todos_os_backends(backend):
+    assert _contagens(TEMPLATE_ANINHADO, backend) == _contagens(TEMPLATE_ANINHADO, "html.parser")
+
+
+def test_texto_dentro_do_template_nao_classifica_os_filhos():
+    contagens = _contagens(b"<template>hi<ul>copyright</ul></template>", "stream")
+    assert contagens["ul"] == {"Elemento de estrutura/estilização": 1}
+    assert contagens["template"] == {"Copyright": 1}